@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .ratelimit import allow_login_attempt
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend que trae el perfil y el carrito junto con el usuario.
+    Casi todas las páginas usan request.user.profile y el contador del
+    carrito, así se resuelven en la misma consulta que carga la sesión.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        # Antes de tocar la contraseña: un intento rechazado no calcula ningún hash.
+        # PermissionDenied corta también el resto de los backends.
+        identifier = username or kwargs.get(get_user_model().USERNAME_FIELD) or kwargs.get('email')
+        if not allow_login_attempt(request, identifier):
+            if request is not None:
+                request.login_throttled = True
+            raise PermissionDenied
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            # ModelBackend (listado después por las sesiones viejas) volvería a
+            # calcular el mismo hash con las mismas credenciales
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        user = (
+            UserModel._default_manager
+            .select_related('profile', 'cart')
+            .filter(pk=user_id)
+            .first()
+        )
+        return user if user is not None and self.user_can_authenticate(user) else None
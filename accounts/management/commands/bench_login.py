@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from marketplace.benchmarks import Measurement, test_database
+
+
+class Command(BaseCommand):
+    help = 'Mide inicios de sesión por segundo y consultas por inicio de sesión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200)
+        parser.add_argument('--real-hasher', action='store_true',
+                            help='Usa el hasher de producción (PBKDF2) en vez de MD5')
+
+    def handle(self, *args, **options):
+        overrides = {
+            # Todas las repeticiones salen de la misma IP y usuario
+            'LOGIN_RATE_LIMITS': {'ip': (10 ** 6, 1), 'username': (10 ** 6, 1)},
+        }
+        if not options['real_hasher']:
+            overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        with test_database(), override_settings(**overrides):
+            User.objects.create_user('bench', email='bench@example.com', password='clave-de-prueba')
+            client = Client()
+            measurement = Measurement('signin')
+
+            for _ in range(options['runs']):
+                with measurement.run():
+                    client.post(reverse('signin'), {'username': 'bench', 'password': 'clave-de-prueba'})
+                client.cookies.clear()
+
+            self.stdout.write(measurement.format())
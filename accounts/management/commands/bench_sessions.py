@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from marketplace.benchmarks import Measurement, test_database
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = 'Mide requests por segundo de product_list con cada backend de sesiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200)
+        parser.add_argument('--products', type=int, default=50)
+        parser.add_argument('--backend', action='append', choices=sorted(settings.SESSION_ENGINES),
+                            help='Backend a medir (se puede repetir). Por defecto, todos')
+
+    def handle(self, *args, **options):
+        backends = options['backend'] or list(settings.SESSION_ENGINES)
+
+        with test_database():
+            user = User.objects.create_user('bench', password='clave-de-prueba')
+            category = Category.objects.create(name='Bench')
+            Product.objects.bulk_create(
+                Product(name=f'Producto {i}', description='-', price=100 + i, stock=10,
+                        category=category, owner=user.profile)
+                for i in range(options['products'])
+            )
+            url = reverse('product_list')
+
+            for backend in backends:
+                with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[backend]):
+                    client = Client()
+                    client.force_login(user)
+                    client.get(url)  # calentar cache y plantillas
+
+                    measurement = Measurement(backend)
+                    for _ in range(options['runs']):
+                        with measurement.run():
+                            client.get(url)
+                    self.stdout.write(measurement.format())
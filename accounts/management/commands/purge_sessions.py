@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+DB_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = 'Borra en lotes las sesiones vencidas de la base de datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Segundos de pausa entre lotes para no bloquear otras escrituras')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in DB_ENGINES:
+            self.stdout.write('El backend de sesiones actual no guarda sesiones en la base de datos')
+            return
+
+        now = timezone.now()
+        total = 0
+        while True:
+            # Lotes cortos: cada DELETE toma el lock de escritura de SQLite poco tiempo
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            total += Session.objects.filter(session_key__in=keys).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'{total} sesiones vencidas borradas'))
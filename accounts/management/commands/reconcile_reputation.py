@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+
+from accounts.models import Profile
+from orders.models import Review
+
+RATING_FIELDS = ['rating_sum', 'rating_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la reputación guardada en los perfiles a partir de las reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        totals = {
+            row['receptor']: row
+            for row in Review.objects.values('receptor').order_by().annotate(
+                rating_sum=Sum('calificacion'),
+                rating_count=Count('id'),
+                **{f'rating_{n}': Count('id', filter=Q(calificacion=n)) for n in range(1, 6)},
+            )
+        }
+
+        fixed = []
+        for profile in Profile.objects.only('id', 'user_id', *RATING_FIELDS).iterator(chunk_size=options['batch_size']):
+            expected = totals.get(profile.user_id, {})
+            if any(getattr(profile, field) != expected.get(field, 0) for field in RATING_FIELDS):
+                for field in RATING_FIELDS:
+                    setattr(profile, field, expected.get(field, 0))
+                fixed.append(profile)
+
+        Profile.objects.bulk_update(fixed, RATING_FIELDS, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{len(fixed)} perfil(es) corregidos'))
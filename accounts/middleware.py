@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.checks import Warning, register
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
+from cart.models import Cart
+
+from .models import Profile
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+@register()
+def check_user_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0) and backend.endswith('LocMemCache'):
+        return [Warning(
+            'AUTH_USER_CACHE_TIMEOUT está activo con LocMemCache.',
+            hint='Cada proceso tiene su propio cache y no ve las invalidaciones de los demás; '
+                 'usar un cache compartido (CACHE_BACKEND) o AUTH_USER_CACHE_TIMEOUT=0.',
+            id='accounts.W001',
+        )]
+    return []
+
+
+def get_cached_user(request):
+    """
+    Igual que auth.get_user, pero si AUTH_USER_CACHE_TIMEOUT > 0 guarda el
+    usuario (con perfil y carrito) en cache junto al hash de sesión con el
+    que se validó. Un hash distinto (por ejemplo, tras cambiar la contraseña)
+    vuelve a pasar por la validación completa.
+    """
+    timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+    user_id = request.session.get(SESSION_KEY)
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not timeout or user_id is None or not session_hash:
+        return auth.get_user(request)
+
+    key = user_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == session_hash:
+        return cached[1]
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, (request.session.get(HASH_SESSION_KEY), user), timeout)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_cached_user(request)
+    return request._cached_user
+
+
+class AuthenticationMiddleware(BaseAuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidar_usuario_relacionado(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.user_id))
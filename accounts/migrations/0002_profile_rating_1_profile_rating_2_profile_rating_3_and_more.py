@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:42
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def calcular_reputacion(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    Review = apps.get_model('orders', 'Review')
+
+    totals = Review.objects.values('receptor').order_by().annotate(
+        rating_sum=Sum('calificacion'),
+        rating_count=Count('id'),
+        **{f'rating_{n}': Count('id', filter=Q(calificacion=n)) for n in range(1, 6)},
+    )
+    for row in totals:
+        Profile.objects.filter(user_id=row.pop('receptor')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('orders', '0007_backfill_seller_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_reputacion, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -11,16 +13,54 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Reputación como vendedor/comprador, mantenida al guardar o borrar reviews
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Perfil de {self.user.username}"
+
+    @property
+    def rating_average(self):
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+
+    def rating_histogram(self):
+        """Lista de (estrellas, cantidad, porcentaje) de 5 a 1"""
+        return [
+            (stars, count, round(100 * count / self.rating_count) if self.rating_count else 0)
+            for stars, count in ((n, getattr(self, f'rating_{n}')) for n in range(5, 0, -1))
+        ]
+
+    @classmethod
+    def apply_rating_change(cls, user_id, added=None, removed=None):
+        """Suma y/o resta una calificación de los agregados con un único UPDATE"""
+        if added == removed:
+            return
+        updates = {}
+        if added:
+            updates[f'rating_{added}'] = F(f'rating_{added}') + 1
+        if removed:
+            updates[f'rating_{removed}'] = F(f'rating_{removed}') - 1
+        updates['rating_sum'] = F('rating_sum') + (added or 0) - (removed or 0)
+        updates['rating_count'] = F('rating_count') + bool(added) - bool(removed)
+        cls.objects.filter(user_id=user_id).update(**updates)
+        # update() no dispara post_save: el usuario cacheado (con su perfil) se
+        # borra a mano. Import local: middleware importa este módulo
+        from .middleware import user_cache_key
+        transaction.on_commit(lambda: cache.delete(user_cache_key(user_id)))
     
     @receiver(post_save, sender=User)
     def create_user_profile(sender, instance, created, **kwargs):
+        # Solo al crear el usuario: cada login guarda last_login y no debe
+        # reescribir el perfil
         if created:
-            Profile.objects.create(user=instance)
-
-    @receiver(post_save, sender=User)
-    def save_user_profile(sender, instance, **kwargs):
-        instance.profile.save()
+            Profile.objects.get_or_create(user=instance)
 
         
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Límite de intentos de inicio de sesión con token bucket, por IP y por usuario.
+
+Cada intento consume un token y los tokens se recargan de forma continua.
+El chequeo corre antes de verificar la contraseña, así una ráfaga de
+intentos no se traduce en una ráfaga de hashes PBKDF2.
+
+- local: buckets en memoria del proceso, con un máximo de claves (LRU).
+- cache: además de los buckets locales, un bucket compartido en el cache de
+  Django para que varios workers vean los mismos intentos. Si el bucket
+  local ya está vacío se rechaza sin consultar el cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _refill(tokens, stamp, capacity, rate, now):
+    return min(capacity, tokens + (now - stamp) * rate)
+
+
+class LocalBuckets:
+    """Buckets en memoria, acotados a max_keys desalojando los menos usados"""
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now, max_keys):
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (capacity, now))
+            tokens = _refill(tokens, stamp, capacity, rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+def _take_shared(key, capacity, rate, now, period):
+    # get/set no es atómico: con mucha concurrencia puede dejar pasar algún
+    # intento de más, que el bucket local del worker sigue acotando
+    cache_key = f'login_rl:{key}'
+    tokens, stamp = cache.get(cache_key, (capacity, now))
+    tokens = _refill(tokens, stamp, capacity, rate, now)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    cache.set(cache_key, (tokens, now), period)
+    return allowed
+
+
+local_buckets = LocalBuckets()
+
+
+def client_ip(request):
+    """
+    IP del cliente según LOGIN_RATE_LIMIT_IP_HEADER. Detrás de un balanceador
+    REMOTE_ADDR es la del balanceador; el header solo es confiable si el
+    proxy lo reescribe. Con una lista (X-Forwarded-For) vale la última
+    entrada, la que agregó el proxy.
+    """
+    if request is None:
+        return ''
+    header = settings.LOGIN_RATE_LIMIT_IP_HEADER
+    value = request.META.get(header, '') or request.META.get('REMOTE_ADDR', '')
+    return value.split(',')[-1].strip()
+
+
+def allow_login_attempt(request, username):
+    """Consume un token de la IP y otro del usuario. False si alguno está vacío"""
+    limits = settings.LOGIN_RATE_LIMITS
+    shared = settings.LOGIN_RATE_LIMIT_BACKEND == 'cache'
+    max_keys = settings.LOGIN_RATE_LIMIT_MAX_KEYS
+    now = time.time()
+
+    keys = []
+    ip = client_ip(request)
+    if ip:
+        keys.append(('ip', f'ip:{ip}'))
+    if username:
+        keys.append(('username', f'user:{username.strip().lower()}'))
+
+    for kind, key in keys:
+        capacity, period = limits[kind]
+        rate = capacity / period
+        if not local_buckets.take(key, capacity, rate, now, max_keys):
+            return False
+        if shared and not _take_shared(key, capacity, rate, now, period):
+            return False
+    return True
@@ -0,0 +1,50 @@
+from allauth.socialaccount.models import SocialAccount
+from allauth.socialaccount.signals import social_account_added, social_account_removed, social_account_updated
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+LINKED_ACCOUNTS_CACHE_TIMEOUT = 60 * 60
+
+
+def _linked_accounts_key(user_id):
+    return f'cuentas_sociales:{user_id}'
+
+
+def get_linked_accounts(user):
+    """
+    Cuentas sociales enlazadas como {proveedor: email}, leídas con una sola
+    consulta y cacheadas por usuario.
+    """
+    key = _linked_accounts_key(user.pk)
+    accounts = cache.get(key)
+    if accounts is None:
+        accounts = {}
+        rows = SocialAccount.objects.filter(user_id=user.pk).order_by('id').values_list('provider', 'extra_data')
+        for provider, extra_data in rows:
+            accounts.setdefault(provider, (extra_data or {}).get('email'))
+        cache.set(key, accounts, LINKED_ACCOUNTS_CACHE_TIMEOUT)
+    return accounts
+
+
+def invalidar_cuentas_sociales(user_id):
+    transaction.on_commit(lambda: cache.delete(_linked_accounts_key(user_id)))
+
+
+@receiver(social_account_added)
+@receiver(social_account_updated)
+def cuenta_social_conectada(sender, request, sociallogin, **kwargs):
+    invalidar_cuentas_sociales(sociallogin.account.user_id)
+
+
+@receiver(social_account_removed)
+def cuenta_social_desconectada(sender, request, socialaccount, **kwargs):
+    invalidar_cuentas_sociales(socialaccount.user_id)
+
+
+# Cambios hechos desde el admin o la shell no pasan por las señales de allauth
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def cuenta_social_modificada(sender, instance, **kwargs):
+    invalidar_cuentas_sociales(instance.user_id)
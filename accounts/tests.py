@@ -1,3 +1,124 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from allauth.socialaccount.models import SocialApp
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .middleware import check_user_cache
+from .models import Profile
+from .ratelimit import LocalBuckets, local_buckets
+
+
+class SigninWritesTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('comprador', password='clave-de-prueba')
+
+    def test_login_no_reescribe_perfil_ni_carrito(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('signin'), {'username': 'comprador', 'password': 'clave-de-prueba'})
+        self.assertEqual(response.status_code, 302)
+
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertFalse([sql for sql in writes if 'accounts_profile' in sql or 'cart_cart' in sql], writes)
+
+
+class AuthUserLoadingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('comprador', password='clave-de-prueba')
+        self.client.force_login(self.user)
+
+    def _queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('product_list'))
+        return [q['sql'] for q in ctx.captured_queries]
+
+    def test_usuario_perfil_y_carrito_en_una_consulta(self):
+        queries = self._queries()
+        user_queries = [sql for sql in queries if 'FROM "auth_user"' in sql]
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn('"cart_cart"', user_queries[0])
+        self.assertFalse([sql for sql in queries if 'FROM "accounts_profile"' in sql or 'FROM "cart_cart"' in sql])
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+    def test_cache_de_usuario_por_hash_de_sesion(self):
+        self._queries()
+        self.assertFalse([sql for sql in self._queries() if 'FROM "auth_user"' in sql])
+
+        # Cambiar la contraseña invalida la sesión aunque el usuario estuviera en cache
+        self.user.set_password('otra-clave-segura')
+        self.user.save()
+        response = self.client.get(reverse('profile_view'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+    def test_cambio_de_reputacion_invalida_el_usuario_cacheado(self):
+        self._queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            Profile.apply_rating_change(self.user.id, added=5)
+        self.assertTrue([sql for sql in self._queries() if 'FROM "auth_user"' in sql])
+
+    def test_check_de_cache_compartido(self):
+        self.assertEqual(check_user_cache(None), [])
+        with override_settings(AUTH_USER_CACHE_TIMEOUT=60):
+            self.assertEqual([w.id for w in check_user_cache(None)], ['accounts.W001'])
+
+    def test_sesiones_con_model_backend(self):
+        session = self.client.session
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session.save()
+        response = self.client.get(reverse('profile_view'))
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(LOGIN_RATE_LIMITS={'ip': (100, 300), 'username': (3, 300)}, LOGIN_RATE_LIMIT_BACKEND='cache')
+class LoginRateLimitTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        cache.clear()
+        self.addCleanup(local_buckets.clear)
+        User.objects.create_user('comprador', password='clave-de-prueba')
+        # Los formularios de login muestran los botones de Google y Facebook
+        for provider in ('google', 'facebook'):
+            app = SocialApp.objects.create(provider=provider, name=provider, client_id='x', secret='y')
+            app.sites.add(Site.objects.get_current())
+
+    def test_rechaza_antes_de_calcular_el_hash(self):
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=False) as check:
+            for _ in range(3):
+                response = self.client.post(reverse('signin'), {'username': 'comprador', 'password': 'mala'})
+                self.assertEqual(response.status_code, 200)
+            response = self.client.post(reverse('signin'), {'username': 'Comprador', 'password': 'mala'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(check.call_count, 3)
+
+    def test_limita_tambien_el_login_de_allauth(self):
+        for _ in range(3):
+            self.client.post(reverse('account_login'), {'login': 'comprador', 'password': 'mala'})
+        with mock.patch.object(User, 'check_password', autospec=True) as check:
+            self.client.post(reverse('account_login'), {'login': 'comprador', 'password': 'clave-de-prueba'})
+        check.assert_not_called()
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    @override_settings(LOGIN_RATE_LIMITS={'ip': (2, 300), 'username': (100, 300)},
+                       LOGIN_RATE_LIMIT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_ip_del_header_del_proxy(self):
+        def login(ip, username):
+            return self.client.post(reverse('signin'), {'username': username, 'password': 'mala'},
+                                    REMOTE_ADDR='10.0.0.1', HTTP_X_REAL_IP=ip).status_code
+
+        self.assertEqual([login('1.1.1.1', f'usuario{i}') for i in range(3)], [200, 200, 429])
+        # Misma IP del balanceador, otro cliente: bucket propio
+        self.assertEqual(login('2.2.2.2', 'otro'), 200)
+
+    def test_buckets_locales_acotados(self):
+        buckets = LocalBuckets()
+        for i in range(5):
+            buckets.take(f'ip:{i}', 1, 1 / 300, 0, max_keys=3)
+        self.assertEqual(list(buckets._buckets), ['ip:2', 'ip:3', 'ip:4'])
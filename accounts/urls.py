@@ -8,6 +8,7 @@ urlpatterns = [
     path('perfil/', views.profile_view, name='profile_view'),
     path('perfil/editar/', views.profile_edit, name='profile_edit'),
     path('perfil/<str:username>/', views.profile_view, name='profile_view_user'),
+    path('perfil/<str:username>/reviews/', views.profile_reviews, name='profile_reviews'),
     path('social/', include('allauth.urls')),
     path('ingresarcontraseña', views.set_password, name="set_password" ),
     path('change-username/', views.change_username, name='change_username'),
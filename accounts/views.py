@@ -6,10 +6,12 @@ from django.contrib.auth import authenticate, login, logout, update_session_auth
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import SetPasswordForm, PasswordChangeForm
 from .forms import CustomUserCreationForm
+from .social import get_linked_accounts
 from django.contrib.auth.models import User
-from orders.models import Review, OrderItem
-from django.db.models import Avg
+from orders.models import Review, TradingPartner
+from orders.reviews import get_reviews_page
 from django.contrib import messages
+from django.http import JsonResponse
 from products.models import Product, Category
 from django.db.models import Sum, Q
 
@@ -40,12 +42,21 @@ def home(request):
         stock__gt=0
     ).order_by('-porcentaje_descuento')[:8]
     
+    # Más deseados: el índice de favorites_count evita contar la tabla de favoritos
+    mas_deseados = list(
+        Product.objects.filter(on_stock=True, stock__gt=0, favorites_count__gt=0)
+        .select_related('category')
+        .order_by('-favorites_count', '-creation_time')[:12]
+    )
+    
     # Categorías
     categories = Category.objects.all()
     
     context = {
         'productos_mas_vendidos': productos_mas_vendidos,
         'productos_en_oferta': productos_en_oferta,
+        # De a 4 productos por slide del carrusel
+        'mas_deseados_slides': [mas_deseados[i:i + 4] for i in range(0, len(mas_deseados), 4)],
         'categories': categories,
     }
     
@@ -72,6 +83,9 @@ def signin(request):
     else:
         user = authenticate(request, username=request.POST['username'],
             password=request.POST['password'])
+        if getattr(request, 'login_throttled', False):
+            messages.error(request, 'Demasiados intentos de inicio de sesión. Esperá unos minutos y volvé a intentar.')
+            return render(request, 'signin.html', {'form': AuthenticationForm()}, status=429)
         if user is None:
             messages.error(request, 'El usuario o la contraseña son incorrectos')
             return render(request, 'signin.html', {'form': AuthenticationForm()})
@@ -125,7 +139,7 @@ def change_username(request):
         
         old_username = request.user.username
         request.user.username = new_username
-        request.user.save()
+        request.user.save(update_fields=['username'])
         
         messages.success(request, f'Tu nombre de usuario ha sido cambiado de "{old_username}" a "{new_username}"')
         return redirect('profile_view')
@@ -165,27 +179,13 @@ def profile_view(request, username=None):
     
     profile = profile_user.profile
     
-    reviews = Review.objects.filter(receptor=profile_user).select_related('autor')
-    
-    promedio = reviews.aggregate(Avg('calificacion'))['calificacion__avg']
-    promedio = round(promedio, 1) if promedio else 0
+    reviews, next_cursor = get_reviews_page(profile_user.id)
     
     puede_dejar_review = False
     mi_review = None
     
     if request.user.is_authenticated and request.user != profile_user:
-        compro_a = OrderItem.objects.filter(
-            order__user=request.user,
-            seller=profile_user,
-            order__status='delivered'
-        ).exists()
-        
-        vendio_a = OrderItem.objects.filter(
-            order__user=profile_user,
-            seller=request.user,
-            order__status='delivered'
-        ).exists()
-        
+        compro_a, vendio_a = TradingPartner.entre(request.user, profile_user)
         puede_dejar_review = compro_a or vendio_a
         mi_review = Review.objects.filter(autor=request.user, receptor=profile_user).first()
     
@@ -193,71 +193,80 @@ def profile_view(request, username=None):
         'profile_user': profile_user,
         'profile': profile,
         'reviews': reviews,
-        'promedio': promedio,
-        'total_reviews': reviews.count(),
+        'next_cursor': next_cursor,
+        'promedio': profile.rating_average,
+        'total_reviews': profile.rating_count,
+        'histograma': profile.rating_histogram(),
         'puede_dejar_review': puede_dejar_review,
         'mi_review': mi_review,
     }
     return render(request, 'profiles/profile.html', context)
 
+def _apply_changes(instance, data):
+    """Asigna los valores de data y devuelve los nombres de los campos que cambiaron"""
+    changed = []
+    for field, value in data.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed.append(field)
+    return changed
+
 @login_required
 def profile_edit(request):
     profile = request.user.profile
     
     if request.method == 'POST':
-        request.user.first_name = request.POST.get('first_name', '')
-        request.user.last_name = request.POST.get('last_name', '')
-        request.user.email = request.POST.get('email', '')
-        request.user.save()
-        
-        profile.bio = request.POST.get('bio', '')
-        profile.phone = request.POST.get('phone', '')
-        profile.address = request.POST.get('address', '')
+        # Solo se escriben los campos que cambiaron
+        user_fields = _apply_changes(request.user, {
+            'first_name': request.POST.get('first_name', ''),
+            'last_name': request.POST.get('last_name', ''),
+            'email': request.POST.get('email', ''),
+        })
+        if user_fields:
+            request.user.save(update_fields=user_fields)
         
+        profile_data = {
+            'bio': request.POST.get('bio', ''),
+            'phone': request.POST.get('phone', ''),
+        }
         if request.FILES.get('profile_picture'):
-            profile.profile_picture = request.FILES['profile_picture']
+            profile_data['profile_picture'] = request.FILES['profile_picture']
         
-        profile.save()
+        profile_fields = _apply_changes(profile, profile_data)
+        if profile_fields:
+            profile.save(update_fields=profile_fields + ['updated_at'])
         
         messages.success(request, 'Perfil actualizado exitosamente')
         return redirect('profile_view')
     
-    # Verificar si tiene cuentas sociales conectadas (con allauth)
-    from allauth.socialaccount.models import SocialAccount
-    
-    google_connected = SocialAccount.objects.filter(
-        user=request.user, 
-        provider='google'
-    ).exists()
-    
-    facebook_connected = SocialAccount.objects.filter(
-        user=request.user, 
-        provider='facebook'
-    ).exists()
-    
-    # Obtener emails de las cuentas sociales
-    google_email = None
-    facebook_email = None
-    
-    if google_connected:
-        google_account = SocialAccount.objects.filter(
-            user=request.user, 
-            provider='google'
-        ).first()
-        google_email = google_account.extra_data.get('email') if google_account else None
-    
-    if facebook_connected:
-        facebook_account = SocialAccount.objects.filter(
-            user=request.user, 
-            provider='facebook'
-        ).first()
-        facebook_email = facebook_account.extra_data.get('email') if facebook_account else None
+    # Cuentas sociales conectadas (con allauth), proveedor -> email
+    linked = get_linked_accounts(request.user)
     
     context = {
         'profile': profile,
-        'google_connected': google_connected,
-        'facebook_connected': facebook_connected,
-        'google_email': google_email,
-        'facebook_email': facebook_email,
+        'google_connected': 'google' in linked,
+        'facebook_connected': 'facebook' in linked,
+        'google_email': linked.get('google'),
+        'facebook_email': linked.get('facebook'),
     }
-    return render(request, 'profiles/profile_edit.html', context)
\ No newline at end of file
+    return render(request, 'profiles/profile_edit.html', context)
+
+
+@login_required
+def profile_reviews(request, username):
+    """Siguiente página de reviews de un usuario, en JSON"""
+    profile_user = get_object_or_404(User, username=username)
+    reviews, next_cursor = get_reviews_page(profile_user.id, request.GET.get('cursor'))
+    
+    return JsonResponse({
+        'reviews': [
+            {
+                'autor': review['autor_username'],
+                'calificacion': review['calificacion'],
+                'comentario': review['comentario'],
+                'fecha': review['fecha_creacion'].strftime('%d/%m/%Y'),
+            }
+            for review in reviews
+        ],
+        'next_cursor': next_cursor,
+    })
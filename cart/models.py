@@ -41,9 +41,4 @@ class CartItem(models.Model):
 @receiver(post_save, sender=User)
 def create_user_cart(sender, instance, created, **kwargs):
     if created:
-        Cart.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_cart(sender, instance, **kwargs):
-    if hasattr(instance, 'cart'):
-        instance.cart.save()
+        Cart.objects.get_or_create(user=instance)
@@ -79,7 +79,6 @@ def cart_remove(request, item_id):
 @login_required
 def cart_clear(request):
     """Vaciar el carrito"""
-    cart = get_object_or_404(Cart, user=request.user)
-    cart.items.all().delete()
+    CartItem.objects.filter(cart__user=request.user).delete()
     messages.success(request, 'Carrito vaciado')
     return redirect('cart_view')
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Utilidades para los comandos de benchmark.
+
+Los benchmarks corren sobre una base de datos de prueba descartable, nunca
+sobre db.sqlite3, y miden tiempo y cantidad de consultas por operación.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """Crea una base de datos de prueba (migrada) y la destruye al salir"""
+    setup_test_environment()
+    old_names = []
+    for alias in connections:
+        conn = connections[alias]
+        old_names.append((conn, conn.settings_dict['NAME']))
+        conn.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        for conn, old_name in old_names:
+            conn.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Measurement:
+    """Acumula duración (ms) y consultas de cada repetición"""
+
+    def __init__(self, name):
+        self.name = name
+        self.durations = []
+        self.queries = []
+
+    @contextmanager
+    def run(self):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            yield
+            self.durations.append((time.perf_counter() - start) * 1000)
+        self.queries.append(len(ctx.captured_queries))
+
+    def summary(self):
+        total = sum(self.durations) / 1000
+        return {
+            'name': self.name,
+            'runs': len(self.durations),
+            'p50_ms': round(percentile(self.durations, 50), 2),
+            'p95_ms': round(percentile(self.durations, 95), 2),
+            'ops_per_sec': round(len(self.durations) / total, 1) if total else 0,
+            'queries': round(statistics.mean(self.queries), 1) if self.queries else 0,
+        }
+
+    def format(self):
+        s = self.summary()
+        return (
+            f"{s['name']:<30} {s['runs']:>6} runs  p50 {s['p50_ms']:>8.2f} ms  "
+            f"p95 {s['p95_ms']:>8.2f} ms  {s['ops_per_sec']:>8.1f} ops/s  {s['queries']:>5} consultas"
+        )
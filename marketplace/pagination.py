@@ -0,0 +1,88 @@
+"""
+Paginación por cursor (keyset) para listas largas.
+
+En vez de OFFSET, cada página continúa desde los valores de orden de la
+última fila vista, así el costo no crece con el número de página y el
+índice que respalda el ordenamiento se usa directamente.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def _default(value):
+    # isoformat completo: DjangoJSONEncoder recorta los microsegundos y el cursor
+    # tiene que reproducir exactamente el valor guardado
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=_default).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Devuelve la lista de valores del cursor, o None si es inválido"""
+    if not token:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(data)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def parse_cursor(model, ordering, token):
+    """
+    Valores del cursor convertidos al tipo de cada campo de `ordering`, o
+    None si el cursor es inválido (se trata como la primera página).
+    """
+    values = decode_cursor(token)
+    if values is None or len(values) != len(ordering):
+        return None
+    parsed = []
+    for field, value in zip(ordering, values):
+        if value is None:
+            return None
+        try:
+            parsed.append(model._meta.get_field(field.lstrip('-')).to_python(value))
+        except (ValidationError, ValueError, TypeError):
+            return None
+    return parsed
+
+
+def _after(ordering, values):
+    """Filtro para las filas que vienen después de `values` según `ordering`"""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {f.lstrip('-'): value for f, value in zip(ordering[:i], values[:i])}
+        condition |= Q(**equal, **{f'{name}__{lookup}': values[i]})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, size=10):
+    """
+    Devuelve (filas, siguiente_cursor). `ordering` debe terminar en un campo
+    único (por ejemplo 'id') para que el orden sea total.
+    """
+    ordering = list(ordering)
+    values = parse_cursor(queryset.model, ordering, cursor)
+    queryset = queryset.order_by(*ordering)
+    if values:
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+        next_cursor = encode_cursor([get(field.lstrip('-')) for field in ordering])
+    return rows, next_cursor
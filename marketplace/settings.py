@@ -48,32 +48,130 @@ INSTALLED_APPS = [
     'accounts',
     'wishlist',
     'orders',
+    'performance',
 ]
 
 SITE_ID = 1
 
 
 MIDDLEWARE = [
+    'performance.middleware.SQLInstrumentationMiddleware',
+    'performance.replicas.ReplicaStickinessMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'accounts.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 LOGIN_URL = '/cuentas/signin/'
 
+# Carga usuario, perfil y carrito en una sola consulta por request
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileBackend',
+    # Las sesiones creadas antes de ProfileBackend guardan este backend
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Intentos de inicio de sesión (token bucket): (intentos, segundos en recargarlos)
+LOGIN_RATE_LIMITS = {
+    'ip': (30, 300),
+    'username': (10, 300),
+}
+# local: por proceso; cache: compartido entre workers a través de CACHES
+LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'local')
+LOGIN_RATE_LIMIT_MAX_KEYS = 10000
+# Clave de request.META con la IP del cliente para el bucket por IP. Detrás de
+# un balanceador usar el header que pone el proxy (por ejemplo HTTP_X_REAL_IP);
+# si no, todos los usuarios comparten la IP del balanceador
+LOGIN_RATE_LIMIT_IP_HEADER = os.environ.get('LOGIN_RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+
+# Instrumentación por request (performance.middleware): consultas, tiempo de SQL
+# y de render por nombre de URL. Apagada por defecto; se activa con
+# PERF_INSTRUMENTATION=1. Con PERF_LOG_FILE escribe una línea JSON por request
+# (por ejemplo logs/requests.jsonl); la rotación queda a cargo de logrotate
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION', '0') == '1'
+PERF_LOG_FILE = os.environ.get('PERF_LOG_FILE') or None
+# warn: loguea un warning; fail: lanza QueryBudgetExceeded (para tests)
+PERF_BUDGET_MODE = os.environ.get('PERF_BUDGET_MODE', 'warn')
+# Máximos por vista: queries, sql_ms y duplicates (repeticiones de una misma
+# consulta). Son topes contra regresiones, medidos con datos de prueba: las
+# vistas con N+1 conocido (home, product_list, order_list, lista_favoritos,
+# profile_view_user) todavía escalan con el tamaño de la página
+PERF_BUDGETS = {
+    'home': {'queries': 40},
+    'product_list': {'queries': 25},
+    'product_detail': {'queries': 15},
+    'seller_storefront': {'queries': 10},
+    'cart_view': {'queries': 15},
+    'order_list': {'queries': 30},
+    'seller_orders': {'queries': 12, 'duplicates': 2},
+    'profile_view': {'queries': 15},
+    'profile_view_user': {'queries': 40},
+    'reviews': {'queries': 12, 'duplicates': 2},
+    'lista_favoritos': {'queries': 40},
+}
+
+# Backend de cache, elegido con la variable de entorno CACHE_BACKEND (la
+# ubicación se cambia con CACHE_LOCATION):
+# - locmem: en memoria de cada proceso (por defecto). Solo sirve con un único
+#   proceso: con varios workers cada uno tiene su propio cache y no ve las
+#   invalidaciones de los demás (tagcache, fragmentos, usuario cacheado)
+# - redis: compartido; requiere el paquete redis
+# - memcached: compartido; requiere el paquete pymemcache
+# - db: compartido en la base; crear la tabla con manage.py createcachetable
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'marketplace'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'marketplace_cache'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
+    }
+}
+
+# Backend de sesiones, elegido con la variable de entorno SESSION_BACKEND:
+# - db: una lectura de SQLite por request (por defecto)
+# - cached_db: lee del cache y escribe en la base; con LocMemCache el cache es
+#   por proceso, así que solo conviene con un único proceso o un cache compartido
+# - cache: solo cache, las sesiones se pierden al reiniciar
+# - signed_cookies: sin base ni cache; la sesión viaja firmada en la cookie
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'db')]
+
+# Segundos que se guarda en cache el usuario autenticado (0 = sin cache).
+# Las invalidaciones (cambio de datos, logout en otro worker) solo llegan a
+# todos los procesos con un cache compartido: con LocMemCache un worker puede
+# seguir usando el usuario viejo hasta que venza (ver el check accounts.W001)
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 0))
+
 ROOT_URLCONF = 'marketplace.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el tiempo de render por request
+        'BACKEND': 'performance.template.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Plantillas compiladas una sola vez por proceso (explícito: con
+            # 'loaders' definido, APP_DIRS no se puede usar)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -85,6 +183,11 @@ TEMPLATES = [
     },
 ]
 
+# Segundos que se guardan los fragmentos {% cache %} de navbar, menú de
+# categorías y tarjetas de producto (0 = sin cache de fragmentos). Las claves
+# cambian solas al modificarse el producto o el catálogo
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 10 * 60))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -94,14 +197,88 @@ WSGI_APPLICATION = 'marketplace.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Perfiles de base de datos, elegidos con DB_PROFILE:
+# - sqlite (por defecto): SQLite sin PRAGMAs, con el journal por defecto
+# - sqlite-tuned: archivo local afinado para varios workers. WAL deja leer
+#   mientras otro escribe, synchronous=NORMAL es seguro con WAL y evita un
+#   fsync por commit, y mmap/cache_size/temp_store reducen lecturas de disco.
+#   Se activa con DB_PROFILE=sqlite-tuned. journal_mode=WAL queda grabado en
+#   el archivo (y agrega db.sqlite3-wal/-shm): para volver atrás hay que
+#   correr PRAGMA journal_mode=DELETE sobre la base
+# - postgres: cuando un solo archivo ya no alcanza; credenciales por entorno
+# Las conexiones se reutilizan entre requests (CONN_MAX_AGE) y se verifican
+# antes de usarlas (CONN_HEALTH_CHECKS)
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=20000',
+    'PRAGMA mmap_size=134217728',  # 128 MB
+    'PRAGMA cache_size=-32000',  # 32 MB
+    'PRAGMA temp_store=MEMORY',
+]
+
+
+def _sqlite_profile(pragmas):
+    return {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Las transacciones toman el lock de escritura al empezar, así checkout
+            # y cancelaciones concurrentes esperan en vez de fallar a mitad de camino
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            # Se ejecuta en cada conexión nueva
+            'init_command': ';'.join(pragmas),
+        },
+        'TEST': {
+            # En archivo (no en memoria) para que los tests de concurrencia usen locks reales
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
+
+
+DATABASE_PROFILES = {
+    'sqlite': _sqlite_profile([]),
+    'sqlite-tuned': _sqlite_profile(SQLITE_PRAGMAS),
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'marketplace'),
+        'USER': os.environ.get('POSTGRES_USER', 'marketplace'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Corta consultas colgadas antes de que acaparen conexiones
+            'options': '-c statement_timeout=15000',
+        },
+    },
+}
+DATABASES = {
+    'default': DATABASE_PROFILES[os.environ.get('DB_PROFILE', 'sqlite')],
 }
 
 
+def _replica(primary, location):
+    """Réplica de lectura del perfil: otro archivo (SQLite) u otro host (PostgreSQL)"""
+    key = 'NAME' if primary['ENGINE'].endswith('sqlite3') else 'HOST'
+    # En tests apunta a la base de prueba de la primaria
+    return {**primary, key: location, 'TEST': {'MIRROR': 'default'}}
+
+
+# Réplicas de lectura (performance.replicas): DB_REPLICAS separadas por coma
+DATABASE_REPLICAS = []
+for _i, _location in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{_i}'] = _replica(DATABASES['default'], _location.strip())
+    DATABASE_REPLICAS.append(f'replica{_i}')
+DATABASE_ROUTERS = ['performance.replicas.PrimaryReplicaRouter']
+# Segundos que un cliente sigue leyendo de la primaria después de escribir
+REPLICA_STICKY_SECONDS = 5
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
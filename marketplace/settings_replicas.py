@@ -0,0 +1,14 @@
+"""
+Primaria + dos réplicas SQLite locales, para probar el router de réplicas:
+
+    python manage.py sync_replicas --settings=marketplace.settings_replicas
+    python manage.py test performance --settings=marketplace.settings_replicas
+
+En tests las réplicas son espejos (TEST MIRROR) de la base de prueba.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, _replica
+
+DATABASE_REPLICAS = ['replica1', 'replica2']
+for _alias in DATABASE_REPLICAS:
+    DATABASES[_alias] = _replica(DATABASES['default'], BASE_DIR / f'db_{_alias}.sqlite3')
@@ -0,0 +1,99 @@
+"""
+Cache con etiquetas sobre el cache de Django.
+
+Cada entrada se guarda junto con la versión de sus etiquetas
+('product:42', 'category:3', 'seller:7'...). Invalidar una etiqueta es
+escribir una versión nueva (O(1), sin recorrer entradas): las entradas que
+guardaron la versión anterior quedan viejas en la próxima lectura. Las
+versiones viven en el cache de Django: todos los workers ven una
+invalidación solo si CACHES es compartido (CACHE_BACKEND redis, memcached o
+db). Con LocMemCache cada proceso tiene sus propias versiones.
+
+Las versiones son time.time_ns() y no contadores: si el cache desaloja la
+clave de una etiqueta, la versión nueva nunca coincide con una vieja.
+
+Contra la estampida, cuando una entrada falta, está vieja o está por vencer
+(refresco anticipado probabilístico), solo el worker que toma un lock la
+recalcula. Los demás devuelven el valor viejo si hay uno, o esperan un poco
+a que aparezca el nuevo.
+"""
+import math
+import random
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 5 * 60
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+# Mayor que 1 adelanta más el refresco; 0 lo desactiva
+EARLY_REFRESH_BETA = 1.0
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def _entry_key(key):
+    return f'tc:{key}'
+
+
+def _lock_key(key):
+    return f'tc-lock:{key}'
+
+
+def tag_versions(tags):
+    """Versión actual de cada etiqueta; crea las que no existen"""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, time.time_ns(), None)
+        # Releer: si otro worker la creó al mismo tiempo, gana la suya
+        found[key] = cache.get(key)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def _expired_early(delta, expires):
+    # XFetch: cuanto más cerca del vencimiento y más caro el cálculo,
+    # más probable es recalcular antes de que la entrada desaparezca
+    return time.time() - delta * EARLY_REFRESH_BETA * math.log(1 - random.random()) >= expires
+
+
+def get_or_set(key, compute, tags=(), timeout=DEFAULT_TIMEOUT):
+    """Devuelve el valor cacheado de `key`, o lo calcula con compute()"""
+    versions = tag_versions(tags)
+    entry = cache.get(_entry_key(key))
+    if entry is not None:
+        entry_versions, value, delta, expires = entry
+        if entry_versions == versions and not _expired_early(delta, expires):
+            return value
+        if not cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+            return value  # Otro worker la está recalculando
+    elif not cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_WAIT)
+            entry = cache.get(_entry_key(key))
+            if entry is not None:
+                return entry[1]
+        # El que tenía el lock no terminó: se calcula igual
+
+    try:
+        start = time.time()
+        value = compute()
+        delta = time.time() - start
+        # Se guardan las versiones leídas antes de calcular: si alguien invalida
+        # mientras tanto, la entrada ya nace vieja
+        cache.set(_entry_key(key), (versions, value, delta, time.time() + timeout), timeout)
+        return value
+    finally:
+        cache.delete(_lock_key(key))
+
+
+def invalidate(*tags):
+    """Cambia la versión de las etiquetas cuando se confirma la transacción actual"""
+    def bump():
+        version = time.time_ns()
+        cache.set_many({_tag_key(tag): version for tag in tags}, None)
+    transaction.on_commit(bump)
@@ -1,18 +1,36 @@
 from django.contrib import admin
-from .models import Order, OrderItem, Review
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OutboxEvent, Review, SellerOrder
+from .state_machine import force_order_status
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
     readonly_fields = ['product_name', 'product_price', 'quantity', 'subtotal']
 
+class SellerOrderInline(admin.TabularInline):
+    model = SellerOrder
+    extra = 0
+    # El estado se cambia desde la orden, para que pase por state_machine
+    readonly_fields = ['seller', 'status', 'total', 'items_count', 'created_at']
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_number', 'user', 'status', 'total', 'paid', 'created_at']
     list_filter = ['status', 'paid', 'created_at']
     search_fields = ['order_number', 'user__username']
     readonly_fields = ['order_number', 'subtotal', 'total', 'created_at', 'updated_at']
-    inlines = [OrderItemInline]
+    inlines = [SellerOrderInline, OrderItemInline]
+
+    def save_model(self, request, obj, form, change):
+        status_changed = change and 'status' in form.changed_data
+        new_status = obj.status
+        if status_changed:
+            obj.status = form.initial['status']
+        super().save_model(request, obj, form, change)
+        if status_changed:
+            # Propaga a SellerOrder, stock y TradingPartner
+            force_order_status(obj.id, new_status)
+            obj.refresh_from_db(fields=['status'])
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
@@ -26,4 +44,22 @@ class ReviewAdmin(admin.ModelAdmin):
     readonly_fields = ['fecha_creacion']
     
     def has_add_permission(self, request):
-        return False
\ No newline at end of file
+        return False
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    readonly_fields = ['product_name', 'product_price', 'quantity', 'subtotal', 'seller']
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ['order_number', 'user', 'status', 'total', 'created_at', 'archived_at']
+    list_filter = ['status', 'archived_at']
+    search_fields = ['order_number', 'user__username']
+    inlines = [ArchivedOrderItemInline]
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'status', 'attempts', 'created_at', 'available_at', 'processed_at']
+    list_filter = ['status', 'topic']
+    readonly_fields = ['created_at', 'processed_at']
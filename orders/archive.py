@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.http import Http404
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+# Estados finales: una orden en estos estados ya no cambia
+ARCHIVABLE_STATUSES = ('delivered', 'cancelled')
+
+ORDER_FIELDS = [
+    'id', 'user_id', 'order_number', 'status', 'subtotal', 'shipping_cost', 'total',
+    'shipping_address', 'shipping_city', 'shipping_country', 'shipping_phone',
+    'payment_method', 'paid', 'created_at', 'updated_at', 'paid_at',
+]
+ITEM_FIELDS = [
+    'id', 'order_id', 'product_id', 'product_name', 'product_price', 'quantity', 'subtotal',
+]
+
+
+def archive_batch(cutoff, batch_size):
+    """Mueve al archivo un lote de órdenes finalizadas antes de cutoff. Devuelve cuántas movió"""
+    with transaction.atomic():
+        ids = list(
+            Order.objects.filter(status__in=ARCHIVABLE_STATUSES, updated_at__lt=cutoff)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        ArchivedOrder.objects.bulk_create(
+            ArchivedOrder(**row) for row in Order.objects.filter(id__in=ids).values(*ORDER_FIELDS)
+        )
+        items = OrderItem.objects.filter(order_id__in=ids).values(
+            *ITEM_FIELDS,
+            # Items viejos pueden no tener vendedor guardado: se toma del dueño del producto
+            seller_ref=Coalesce(F('seller_id'), F('product__owner__user_id')),
+        )
+        ArchivedOrderItem.objects.bulk_create(
+            ArchivedOrderItem(seller_id=row.pop('seller_ref'), **row) for row in items
+        )
+        Order.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_orders(days, batch_size=500):
+    """Archiva en lotes las órdenes entregadas o canceladas hace más de `days` días"""
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
+
+
+def get_order_or_archived(order_id, **filters):
+    """Busca la orden en la tabla activa y, si ya no está, en el archivo"""
+    order = Order.objects.filter(id=order_id, **filters).first()
+    if order is None:
+        order = ArchivedOrder.objects.filter(id=order_id, **filters).first()
+    if order is None:
+        raise Http404('Orden no encontrada')
+    return order
+
+
+def is_archived(order):
+    return isinstance(order, ArchivedOrder)
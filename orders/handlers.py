@@ -0,0 +1,13 @@
+import logging
+
+from .outbox import handler
+
+logger = logging.getLogger('orders.events')
+
+
+@handler('order.created')
+@handler('order.cancelled')
+@handler('order.status_changed')
+def log_order_event(event):
+    """Deja registro de los cambios de las órdenes fuera del request"""
+    logger.info('%s %s', event.topic, event.payload)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from orders.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = 'Mueve al archivo las órdenes entregadas o canceladas hace más de N días'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = archive_orders(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} orden(es) archivadas'))
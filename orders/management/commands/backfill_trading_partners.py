@@ -0,0 +1,31 @@
+from itertools import chain, islice
+
+from django.core.management.base import BaseCommand
+
+from orders.models import ArchivedOrderItem, SellerOrder, TradingPartner
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de compradores/vendedores con transacciones entregadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pares = chain(
+            SellerOrder.objects.filter(status='delivered')
+            .values_list('order__user_id', 'seller_id').distinct().iterator(chunk_size=batch_size),
+            ArchivedOrderItem.objects.filter(order__status='delivered')
+            .values_list('order__user_id', 'seller_id').distinct().iterator(chunk_size=batch_size),
+        )
+
+        antes = TradingPartner.objects.count()
+        while True:
+            lote = list(islice(pares, batch_size))
+            if not lote:
+                break
+            TradingPartner.registrar(lote)
+
+        nuevos = TradingPartner.objects.count() - antes
+        self.stdout.write(self.style.SUCCESS(f'{nuevos} par(es) nuevos'))
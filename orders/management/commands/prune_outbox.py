@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from orders.outbox import RETENTION_DAYS, prune_processed
+
+
+class Command(BaseCommand):
+    help = 'Borra los eventos del outbox ya procesados hace más de N días'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = prune_processed(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} evento(s) borrados'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.outbox import lag_metrics, process_batch
+
+
+class Command(BaseCommand):
+    help = 'Procesa los eventos pendientes del outbox de órdenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--once', action='store_true',
+                            help='Vacía la cola disponible y termina')
+        parser.add_argument('--stats', action='store_true',
+                            help='Muestra las métricas de la cola y termina')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_metrics()
+            return
+
+        while True:
+            done, failed = process_batch(options['batch_size'])
+            if done or failed:
+                self.stdout.write(f'Procesados: {done} | Fallidos: {failed}')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+        self.print_metrics()
+
+    def print_metrics(self):
+        metrics = lag_metrics()
+        self.stdout.write(
+            f"Pendientes: {metrics['pending']} (listos: {metrics['ready']}) | "
+            f"Fallidos: {metrics['failed']} | "
+            f"Lag: {metrics['oldest_pending_seconds']:.1f}s"
+        )
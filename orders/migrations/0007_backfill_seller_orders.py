@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:41
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def crear_seller_orders(apps, schema_editor):
+    """Agrupa los items existentes por orden y vendedor"""
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    SellerOrder = apps.get_model('orders', 'SellerOrder')
+
+    grupos = defaultdict(list)
+    items = OrderItem.objects.filter(seller_order__isnull=True).select_related('order', 'product__owner')
+    for item in items.iterator(chunk_size=1000):
+        seller_id = item.seller_id or (item.product.owner.user_id if item.product.owner_id else None)
+        grupos[(item.order_id, seller_id)].append(item)
+
+    for (order_id, seller_id), group in grupos.items():
+        order = group[0].order
+        seller_order = SellerOrder.objects.create(
+            order_id=order_id,
+            seller_id=seller_id,
+            status=order.status,
+            total=sum(item.subtotal for item in group),
+            items_count=len(group),
+            created_at=order.created_at,
+        )
+        OrderItem.objects.filter(id__in=[item.id for item in group]).update(seller_order=seller_order)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_sellerorder_orderitem_seller_order_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_seller_orders, migrations.RunPython.noop),
+    ]
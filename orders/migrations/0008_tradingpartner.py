@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def cargar_pares(apps, schema_editor):
+    SellerOrder = apps.get_model('orders', 'SellerOrder')
+    ArchivedOrderItem = apps.get_model('orders', 'ArchivedOrderItem')
+    TradingPartner = apps.get_model('orders', 'TradingPartner')
+
+    pares = set(
+        SellerOrder.objects.filter(status='delivered').values_list('order__user_id', 'seller_id')
+    ) | set(
+        ArchivedOrderItem.objects.filter(order__status='delivered').values_list('order__user_id', 'seller_id')
+    )
+    TradingPartner.objects.bulk_create(
+        [TradingPartner(buyer_id=buyer_id, seller_id=seller_id)
+         for buyer_id, seller_id in pares if seller_id and buyer_id != seller_id],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_backfill_seller_orders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradingPartner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['seller', 'buyer'], name='orders_trad_seller__537e8c_idx')],
+                'unique_together': {('buyer', 'seller')},
+            },
+        ),
+        migrations.RunPython(cargar_pares, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_tradingpartner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'updated_at'], name='orders_orde_status_728b00_idx'),
+        ),
+    ]
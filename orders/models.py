@@ -3,6 +3,11 @@ from django.contrib.auth.models import User
 from products.models import Product
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import Profile
 
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -48,6 +53,10 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Selección de órdenes finalizadas para archivar (orders.archive)
+            models.Index(fields=['status', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"Orden #{self.order_number}"
@@ -60,8 +69,32 @@ class Order(models.Model):
             self.order_number = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
         super().save(*args, **kwargs)
 
+class SellerOrder(models.Model):
+    """Parte de una orden que le corresponde a un vendedor, con su propio estado y total"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='seller_orders')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seller_orders', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, default='pending')
+    
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    items_count = models.PositiveIntegerField(default=0)
+    
+    # Copia de order.created_at para que el índice del vendedor cubra el orden por fecha
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['order', 'seller']
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['seller', 'status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Orden #{self.order.order_number} - {self.seller}"
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    seller_order = models.ForeignKey(SellerOrder, on_delete=models.CASCADE, related_name='items', null=True, blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sold_items', null=True, blank=True)  # NUEVO
     
@@ -122,24 +155,141 @@ class Review(models.Model):
     
     def tienen_transaccion(self):
         """Verifica si hay al menos una transacción entre autor y receptor"""
-        from orders.models import Order, OrderItem
-        
         # Caso 1: Autor compró algo al receptor
-        compro_a = OrderItem.objects.filter(
-            order__user=self.autor,
-            seller=self.receptor,
-            order__status='delivered'
-        ).exists()
-        
         # Caso 2: Autor vendió algo al receptor
-        vendio_a = OrderItem.objects.filter(
-            order__user=self.receptor,
-            seller=self.autor,
-            order__status='delivered'
-        ).exists()
-        
+        compro_a, vendio_a = TradingPartner.entre(self.autor, self.receptor)
         return compro_a or vendio_a
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Calificación guardada, para ajustar la reputación si se edita
+        instance._calificacion_guardada = instance.__dict__.get('calificacion')
+        return instance
+    
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Review)
+def actualizar_reputacion(sender, instance, created, **kwargs):
+    anterior = None if created else getattr(instance, '_calificacion_guardada', None)
+    Profile.apply_rating_change(instance.receptor_id, added=instance.calificacion, removed=anterior)
+    instance._calificacion_guardada = instance.calificacion
+
+
+@receiver(post_delete, sender=Review)
+def descontar_reputacion(sender, instance, **kwargs):
+    calificacion = getattr(instance, '_calificacion_guardada', instance.calificacion)
+    Profile.apply_rating_change(instance.receptor_id, removed=calificacion)
+
+
+class ArchivedOrder(models.Model):
+    """Orden entregada o cancelada hace tiempo, movida fuera de la tabla activa"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    
+    order_number = models.CharField(max_length=20, unique=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+    shipping_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    shipping_address = models.CharField(max_length=255)
+    shipping_city = models.CharField(max_length=100)
+    shipping_country = models.CharField(max_length=100)
+    shipping_phone = models.CharField(max_length=20)
+    
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_METHOD_CHOICES)
+    paid = models.BooleanField(default=False)
+    
+    # Se copian tal cual de la orden original (sin auto_now)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    paid_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Orden #{self.order_number} (archivada)"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    # El producto puede borrarse después de archivar; el nombre y precio quedan guardados
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_sold_items', null=True, blank=True)
+    
+    product_name = models.CharField(max_length=200)
+    product_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    def __str__(self):
+        return f"{self.quantity}x {self.product_name} (Orden #{self.order.order_number})"
+
+class TradingPartner(models.Model):
+    """Comprador que recibió al menos un pedido entregado del vendedor"""
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['buyer', 'seller']
+        indexes = [
+            models.Index(fields=['seller', 'buyer']),
+        ]
+    
+    def __str__(self):
+        return f"{self.buyer} compró a {self.seller}"
+    
+    @classmethod
+    def entre(cls, usuario, otro):
+        """Devuelve (usuario compró a otro, otro compró a usuario) con una sola consulta"""
+        compradores = set(cls.objects.filter(
+            models.Q(buyer=usuario, seller=otro) | models.Q(buyer=otro, seller=usuario)
+        ).values_list('buyer_id', flat=True))
+        return usuario.id in compradores, otro.id in compradores
+    
+    @classmethod
+    def registrar(cls, pares):
+        """Guarda pares (buyer_id, seller_id); los que ya existen se ignoran"""
+        cls.objects.bulk_create(
+            [cls(buyer_id=buyer_id, seller_id=seller_id)
+             for buyer_id, seller_id in set(pares) if seller_id and buyer_id != seller_id],
+            ignore_conflicts=True,
+        )
+
+
+class OutboxEvent(models.Model):
+    """Evento pendiente de procesar, escrito en la misma transacción que la orden"""
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('done', 'Procesado'),
+        ('failed', 'Fallido'),
+    ]
+
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id} ({self.status})"
@@ -0,0 +1,117 @@
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger('orders.outbox')
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5           # segundos, se duplica en cada reintento
+BACKOFF_MAX = 60 * 60
+LEASE_SECONDS = 5 * 60     # si el worker muere, el evento vuelve a estar disponible
+RETENTION_DAYS = 7         # los eventos procesados se borran después de este tiempo
+
+_handlers = {}
+
+
+def handler(topic):
+    """
+    Registra una función que procesa los eventos de un tópico.
+    La entrega es al menos una vez: los handlers deben ser idempotentes.
+    """
+    def decorator(func):
+        _handlers.setdefault(topic, []).append(func)
+        return func
+    return decorator
+
+
+def publish(topic, **payload):
+    """
+    Encola un evento. Debe llamarse dentro de la transacción que modifica la
+    orden, así el evento existe si y sólo si el cambio se confirmó.
+    """
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def backoff(attempts):
+    """Segundos a esperar antes del siguiente intento"""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def claim_batch(batch_size):
+    """
+    Reserva hasta batch_size eventos disponibles moviendo su available_at
+    hacia adelante. Con skip_locked varios workers no se pisan entre sí.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = OutboxEvent.objects.filter(status='pending', available_at__lte=now).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        ids = list(pending.values_list('id', flat=True)[:batch_size])
+        if ids:
+            OutboxEvent.objects.filter(id__in=ids).update(
+                available_at=now + timedelta(seconds=LEASE_SECONDS)
+            )
+    return list(OutboxEvent.objects.filter(id__in=ids).order_by('id'))
+
+
+def dispatch(event):
+    for func in _handlers.get(event.topic, []):
+        func(event)
+
+
+def process_batch(batch_size=100):
+    """Procesa un lote de eventos. Devuelve (procesados, fallidos)"""
+    done, failed = [], 0
+
+    for event in claim_batch(batch_size):
+        try:
+            dispatch(event)
+        except Exception as e:
+            failed += 1
+            attempts = event.attempts + 1
+            logger.exception('Error procesando %s', event)
+            OutboxEvent.objects.filter(id=event.id).update(
+                attempts=attempts,
+                last_error=str(e)[:1000],
+                status='failed' if attempts >= MAX_ATTEMPTS else 'pending',
+                available_at=timezone.now() + timedelta(seconds=backoff(attempts)),
+            )
+        else:
+            done.append(event.id)
+
+    if done:
+        OutboxEvent.objects.filter(id__in=done).update(status='done', processed_at=timezone.now())
+    return len(done), failed
+
+
+def lag_metrics():
+    """Estado de la cola: pendientes, fallidos y antigüedad del evento más viejo"""
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(status='pending')
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    return {
+        'pending': pending.count(),
+        'ready': pending.filter(available_at__lte=now).count(),
+        'failed': OutboxEvent.objects.filter(status='failed').count(),
+        'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else 0,
+    }
+
+
+def prune_processed(days=RETENTION_DAYS, batch_size=1000):
+    """Borra en lotes los eventos procesados hace más de `days` días. Devuelve cuántos"""
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(status='done', processed_at__lt=cutoff)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += OutboxEvent.objects.filter(id__in=ids).delete()[0]
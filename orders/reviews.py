@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from marketplace.pagination import keyset_page
+from .models import Review
+
+REVIEWS_PAGE_SIZE = 10
+REVIEWS_ORDERING = ('-fecha_creacion', '-id')
+REVIEWS_CACHE_TIMEOUT = 60 * 60
+
+
+def _first_page_key(receptor_id):
+    return f'reviews:primera:{receptor_id}'
+
+
+def get_reviews_page(receptor_id, cursor=None):
+    """
+    Página de reviews recibidas como diccionarios compactos, recorriendo el
+    índice (receptor, -fecha_creacion). La primera página queda cacheada.
+    """
+    if not cursor:
+        cached = cache.get(_first_page_key(receptor_id))
+        if cached is not None:
+            return cached
+
+    reviews = Review.objects.filter(receptor_id=receptor_id).values(
+        'id', 'calificacion', 'comentario', 'fecha_creacion', autor_username=F('autor__username'),
+    )
+    page = keyset_page(reviews, REVIEWS_ORDERING, cursor, REVIEWS_PAGE_SIZE)
+
+    if not cursor:
+        cache.set(_first_page_key(receptor_id), page, REVIEWS_CACHE_TIMEOUT)
+    return page
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidar_reviews(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache.delete(_first_page_key(instance.receptor_id)))
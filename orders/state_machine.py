@@ -0,0 +1,157 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import outbox
+from .models import Order, OrderItem, SellerOrder, TradingPartner
+from .stock import restore_stock
+
+# Estados a los que puede pasar cada estado
+TRANSITIONS = {
+    'pending': ('processing', 'cancelled'),
+    'processing': ('shipped', 'cancelled'),
+    'shipped': ('delivered',),
+    'delivered': (),
+    'cancelled': (),
+}
+
+# Avance de una orden que no fue cancelada
+PROGRESS = ['pending', 'processing', 'shipped', 'delivered']
+
+# Estados que el vendedor puede aplicar a muchas órdenes a la vez
+BULK_STATUSES = ('processing', 'shipped', 'delivered', 'cancelled')
+
+
+def can_transition(current_status, new_status):
+    """Indica si una orden puede pasar de current_status a new_status"""
+    return new_status in TRANSITIONS.get(current_status, ())
+
+
+def sources_for(new_status):
+    """Estados desde los que se puede llegar a new_status"""
+    return [status for status, targets in TRANSITIONS.items() if new_status in targets]
+
+
+def next_statuses(current_status):
+    """Lista de (valor, etiqueta) a los que puede pasar una orden"""
+    labels = dict(Order.STATUS_CHOICES)
+    return [(status, labels[status]) for status in TRANSITIONS.get(current_status, ())]
+
+
+def resolve_order_status(statuses):
+    """
+    Estado de la orden a partir del de sus partes: la orden avanza al ritmo de la
+    parte más atrasada y sólo queda cancelada si todas se cancelaron.
+    """
+    activos = [status for status in statuses if status != 'cancelled']
+    if not activos:
+        return 'cancelled'
+    return min(activos, key=PROGRESS.index)
+
+
+def sync_order_statuses(order_ids, stamp):
+    """Recalcula el estado de las órdenes con un UPDATE por estado resultante"""
+    statuses = defaultdict(list)
+    for order_id, status in SellerOrder.objects.filter(order_id__in=order_ids).values_list('order_id', 'status'):
+        statuses[order_id].append(status)
+
+    targets = defaultdict(list)
+    for order_id, order_statuses in statuses.items():
+        targets[resolve_order_status(order_statuses)].append(order_id)
+
+    for status, ids in targets.items():
+        Order.objects.filter(id__in=ids).exclude(status=status).update(status=status, updated_at=stamp)
+
+
+def transition_orders(seller, order_ids, new_status):
+    """
+    Cambia el estado de la parte del vendedor en las órdenes que lo permitan.
+    La propiedad y el estado de origen se validan en el mismo UPDATE sobre el
+    índice (seller, status, created_at). Devuelve la cantidad actualizada.
+    """
+    sources = sources_for(new_status)
+    if not sources or not order_ids:
+        return 0
+
+    stamp = timezone.now()
+
+    with transaction.atomic():
+        # Se eligen las filas con la misma guarda que el UPDATE y se bloquean,
+        # así la lista es exactamente la de las partes que cambian
+        changed = list(SellerOrder.objects.select_for_update().filter(
+            seller=seller, order_id__in=order_ids, status__in=sources
+        ).values_list('id', 'order_id'))
+        if not changed:
+            return 0
+        updated = SellerOrder.objects.filter(
+            id__in=[so_id for so_id, _ in changed], status__in=sources
+        ).update(status=new_status, updated_at=stamp)
+
+        if new_status == 'cancelled':
+            restore_stock(OrderItem.objects.filter(seller_order_id__in=[so_id for so_id, _ in changed]))
+
+        if new_status == 'delivered':
+            TradingPartner.registrar(
+                SellerOrder.objects.filter(id__in=[so_id for so_id, _ in changed])
+                .values_list('order__user_id', 'seller_id')
+            )
+
+        changed_orders = [order_id for _, order_id in changed]
+        sync_order_statuses(changed_orders, stamp)
+        outbox.publish('order.status_changed', order_ids=changed_orders, status=new_status,
+                       seller_id=seller.id)
+    return updated
+
+
+def cancel_buyer_order(user, order_id):
+    """
+    Cancela una orden del comprador y devuelve su stock en la misma transacción.
+    El UPDATE condicional garantiza que el stock se devuelva una sola vez y que
+    no se cancele una orden con partes ya enviadas.
+    """
+    stamp = timezone.now()
+    with transaction.atomic():
+        cancelled = Order.objects.filter(
+            id=order_id, user=user, status__in=sources_for('cancelled')
+        ).exclude(
+            Exists(SellerOrder.objects.filter(order=OuterRef('pk'), status__in=['shipped', 'delivered']))
+        ).update(status='cancelled', updated_at=stamp)
+        if cancelled:
+            pendientes = list(
+                SellerOrder.objects.filter(order_id=order_id).exclude(status='cancelled').values_list('id', flat=True)
+            )
+            restore_stock(OrderItem.objects.filter(seller_order_id__in=pendientes))
+            SellerOrder.objects.filter(id__in=pendientes).update(status='cancelled', updated_at=stamp)
+            outbox.publish('order.cancelled', order_id=order_id, user_id=user.id)
+    return bool(cancelled)
+
+
+def force_order_status(order_id, new_status):
+    """
+    Cambio manual de estado (admin) sin pasar por TRANSITIONS. Se aplica a las
+    partes de cada vendedor, con los mismos efectos que transition_orders
+    (stock al cancelar, TradingPartner al entregar), y el estado de la orden
+    se recalcula a partir de ellas. Las partes canceladas no se reabren.
+    """
+    stamp = timezone.now()
+    with transaction.atomic():
+        if not SellerOrder.objects.filter(order_id=order_id).exists():
+            # Orden sin partes por vendedor: no hay nada que propagar
+            Order.objects.filter(id=order_id).update(status=new_status, updated_at=stamp)
+            return 0
+        changed = list(SellerOrder.objects.select_for_update().filter(order_id=order_id).exclude(
+            status__in=[new_status, 'cancelled']
+        ).values_list('id', flat=True))
+        if changed:
+            if new_status == 'cancelled':
+                restore_stock(OrderItem.objects.filter(seller_order_id__in=changed))
+            SellerOrder.objects.filter(id__in=changed).update(status=new_status, updated_at=stamp)
+            if new_status == 'delivered':
+                TradingPartner.registrar(
+                    SellerOrder.objects.filter(id__in=changed).values_list('order__user_id', 'seller_id')
+                )
+            outbox.publish('order.status_changed', order_ids=[order_id], status=new_status, seller_id=None)
+        sync_order_statuses([order_id], stamp)
+    return len(changed)
@@ -0,0 +1,48 @@
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.lookups import GreaterThan
+
+from products.invalidation import invalidate_sellers
+from products.models import Product
+
+
+class StockInsuficiente(Exception):
+    """No hay unidades suficientes para completar la compra"""
+
+    def __init__(self, product_name):
+        self.product_name = product_name
+        super().__init__(f'No hay stock suficiente de {product_name}')
+
+
+def reserve_stock(product, quantity):
+    """
+    Descuenta unidades de un producto con un UPDATE condicional.
+    Si otra compra se llevó el stock antes, lanza StockInsuficiente.
+    """
+    updated = Product.objects.filter(id=product.id, stock__gte=quantity).update(
+        stock=F('stock') - quantity,
+        on_stock=GreaterThan(F('stock'), quantity),
+    )
+    if not updated:
+        raise StockInsuficiente(product.name)
+    invalidate_sellers([product.owner_id])
+
+
+def restore_stock(items):
+    """Devuelve al stock las unidades de un queryset de OrderItem con un único UPDATE"""
+    totals = (
+        items
+        .values('product_id', 'product__owner_id')
+        .annotate(cantidad=Sum('quantity'))
+        .order_by()
+    )
+    whens = [When(id=row['product_id'], then=Value(row['cantidad'])) for row in totals]
+    if not whens:
+        return 0
+
+    cantidad = Case(*whens, default=Value(0), output_field=IntegerField())
+    product_ids = [row['product_id'] for row in totals]
+    invalidate_sellers([row['product__owner_id'] for row in totals])
+    return Product.objects.filter(id__in=product_ids).update(
+        stock=F('stock') + cantidad,
+        on_stock=GreaterThan(F('stock') + cantidad, 0),
+    )
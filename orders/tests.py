@@ -1,3 +1,377 @@
-from django.test import TestCase
+import csv
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.contrib.messages import get_messages
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from cart.models import CartItem
+from marketplace.pagination import encode_cursor
+from products.models import Category, Product
+from . import outbox
+from .admin import OrderAdmin
+from .archive import archive_orders
+from .models import ArchivedOrder, Order, OrderItem, OutboxEvent, Review, SellerOrder, TradingPartner
+from .state_machine import cancel_buyer_order, transition_orders
+
+
+class ConcurrentStockTests(TransactionTestCase):
+    """Cancelaciones y compras simultáneas sobre el mismo producto"""
+    # Con réplicas configuradas, las lecturas de los hilos van a las réplicas
+    databases = '__all__'
+
+    def setUp(self):
+        seller = User.objects.create_user('vendedor', password='x')
+        self.product = Product.objects.create(
+            name='Mate', owner=seller.profile, category=Category.objects.create(name='Hogar'),
+            stock=5, price=100,
+        )
+
+    def _order(self, buyer, quantity=1):
+        order = Order.objects.create(
+            user=buyer, subtotal=100, total=100, shipping_address='Calle 1',
+            shipping_city='Rosario', shipping_country='Argentina', shipping_phone='1',
+            payment_method='paypal',
+        )
+        seller_order = SellerOrder.objects.create(
+            order=order, seller=self.product.owner.user, total=100 * quantity, items_count=1,
+        )
+        OrderItem.objects.create(
+            order=order, seller_order=seller_order, product=self.product, product_name=self.product.name,
+            product_price=self.product.price, quantity=quantity, subtotal=100 * quantity,
+        )
+        return order
+
+    def _run_concurrently(self, jobs):
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def worker(job):
+            try:
+                barrier.wait()
+                job()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(job,)) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_cancels_and_checkouts_keep_stock_consistent(self):
+        # 3 unidades ya vendidas en órdenes pendientes, quedan 2 en stock
+        buyers = [User.objects.create_user(f'comprador{i}', password='x') for i in range(6)]
+        pending = [self._order(buyer) for buyer in buyers[:3]]
+        Product.objects.filter(id=self.product.id).update(stock=2)
+
+        # Otros 3 compradores intentan llevarse 1 unidad cada uno
+        for buyer in buyers[3:]:
+            CartItem.objects.create(cart=buyer.cart, product=self.product, quantity=1)
+
+        def cancel(order):
+            def job():
+                client = Client()
+                client.force_login(order.user)
+                # Doble click: la cancelación sólo debe devolver stock una vez
+                client.get(f'/pedidos/{order.id}/cancelar/')
+                client.get(f'/pedidos/{order.id}/cancelar/')
+            return job
+
+        def checkout(buyer):
+            def job():
+                client = Client()
+                client.force_login(buyer)
+                client.post('/pedidos/create/', {
+                    'shipping_address': 'Calle 2', 'shipping_city': 'Rosario',
+                    'shipping_phone': '1', 'payment_method': 'paypal',
+                })
+            return job
+
+        self._run_concurrently([cancel(o) for o in pending] + [checkout(b) for b in buyers[3:]])
+
+        self.product.refresh_from_db()
+        self.assertEqual(Order.objects.filter(id__in=[o.id for o in pending], status='cancelled').count(), 3)
+        sold = OrderItem.objects.filter(order__status='pending').count()
+        # 2 iniciales + 3 devueltas - vendidas ahora; nunca se vende de más
+        self.assertEqual(self.product.stock, 5 - sold)
+        self.assertGreaterEqual(sold, 2)
+        self.assertEqual(self.product.on_stock, self.product.stock > 0)
+
+
+def crear_orden(buyer, product, quantity=1, status='pending'):
+    """Orden de un solo vendedor con una línea"""
+    order = Order.objects.create(
+        user=buyer, status=status, subtotal=100 * quantity, total=100 * quantity, shipping_address='Calle 1',
+        shipping_city='Rosario', shipping_country='Argentina', shipping_phone='1', payment_method='paypal',
+    )
+    seller_order = SellerOrder.objects.create(
+        order=order, seller=product.owner.user, status=status, total=100 * quantity, items_count=1,
+    )
+    OrderItem.objects.create(
+        order=order, seller_order=seller_order, product=product, seller=product.owner.user,
+        product_name=product.name, product_price=100, quantity=quantity, subtotal=100 * quantity,
+    )
+    return order
+
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user('vendedor', password='x')
+        self.buyer = User.objects.create_user('comprador', password='x')
+        self.product = Product.objects.create(
+            name='Mate', owner=self.seller.profile, category=Category.objects.create(name='Hogar'),
+            stock=5, price=100,
+        )
+        self.orders = [crear_orden(self.buyer, self.product, 2) for _ in range(2)]
+        self.client.force_login(self.seller)
+
+    def bulk(self, status, orders):
+        response = self.client.post(reverse('bulk_update_order_status'),
+                                    {'status': status, 'order_ids': [o.id for o in orders]})
+        return [str(m) for m in get_messages(response.wsgi_request)]
+
+    def statuses(self):
+        return [SellerOrder.objects.get(order=o).status for o in self.orders]
+
+    def test_pendientes_pasan_a_procesando(self):
+        self.bulk('processing', self.orders)
+        self.assertEqual(self.statuses(), ['processing', 'processing'])
+        self.assertEqual(Order.objects.get(id=self.orders[0].id).status, 'processing')
+
+    def test_transicion_no_permitida_se_informa(self):
+        msgs = self.bulk('shipped', self.orders)
+        self.assertEqual(self.statuses(), ['pending', 'pending'])
+        self.assertIn('2 orden(es) no se pudieron actualizar a ese estado', msgs)
+
+        self.bulk('processing', self.orders[:1])
+        msgs = self.bulk('shipped', self.orders)
+        self.assertEqual(self.statuses(), ['shipped', 'pending'])
+        self.assertIn('1 orden(es) no se pudieron actualizar a ese estado', msgs)
+
+    def test_ordenes_de_otro_vendedor_no_cambian(self):
+        otro = User.objects.create_user('otro', password='x')
+        self.client.force_login(otro)
+        self.bulk('processing', self.orders)
+        self.assertEqual(self.statuses(), ['pending', 'pending'])
+
+    def test_cancelar_devuelve_stock(self):
+        self.bulk('cancelled', self.orders)
+        self.product.refresh_from_db()
+        self.assertEqual(self.statuses(), ['cancelled', 'cancelled'])
+        self.assertEqual(self.product.stock, 9)
+
+
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.should_fail = False
+
+        def handle(event):
+            self.calls.append(event.id)
+            if self.should_fail:
+                raise RuntimeError('falla de prueba')
+
+        patcher = mock.patch.dict(outbox._handlers, {'prueba': [handle]})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.event = outbox.publish('prueba', valor=1)
+
+    def make_available(self):
+        OutboxEvent.objects.filter(id=self.event.id).update(available_at=timezone.now())
+
+    def test_procesa_y_marca_hecho(self):
+        self.assertEqual(outbox.process_batch(), (1, 0))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.status, 'done')
+        self.assertEqual(outbox.process_batch(), (0, 0))
+
+    def test_el_lease_evita_reclamar_dos_veces(self):
+        self.assertEqual(len(outbox.claim_batch(10)), 1)
+        self.assertEqual(outbox.claim_batch(10), [])
+        self.assertEqual(outbox.lag_metrics()['ready'], 0)
+
+    def test_reintento_con_backoff_hasta_agotar_intentos(self):
+        with self.assertLogs('orders.outbox', level='ERROR'):
+            self.should_fail = True
+            before = timezone.now()
+            self.assertEqual(outbox.process_batch(), (0, 1))
+            self.event.refresh_from_db()
+            self.assertEqual((self.event.status, self.event.attempts), ('pending', 1))
+            self.assertGreaterEqual(self.event.available_at, before + timedelta(seconds=outbox.backoff(1)))
+            # Todavía no está disponible
+            self.assertEqual(outbox.process_batch(), (0, 0))
+
+            for _ in range(outbox.MAX_ATTEMPTS - 1):
+                self.make_available()
+                outbox.process_batch()
+            self.event.refresh_from_db()
+            self.assertEqual((self.event.status, self.event.attempts), ('failed', outbox.MAX_ATTEMPTS))
+            self.assertEqual(self.event.last_error, 'falla de prueba')
+            self.assertEqual(len(self.calls), outbox.MAX_ATTEMPTS)
+
+        metrics = outbox.lag_metrics()
+        self.assertEqual((metrics['pending'], metrics['failed']), (0, 1))
+
+    def test_metricas_de_lag(self):
+        OutboxEvent.objects.filter(id=self.event.id).update(created_at=timezone.now() - timedelta(minutes=2))
+        metrics = outbox.lag_metrics()
+        self.assertEqual((metrics['pending'], metrics['ready']), (1, 1))
+        self.assertGreaterEqual(metrics['oldest_pending_seconds'], 120)
+
+    def test_prune_borra_solo_procesados_viejos(self):
+        outbox.process_batch()
+        reciente = outbox.publish('prueba', valor=2)
+        outbox.process_batch()
+        pendiente = outbox.publish('prueba', valor=3)
+        OutboxEvent.objects.filter(id=self.event.id).update(processed_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(outbox.prune_processed(days=7), 1)
+        self.assertEqual(set(OutboxEvent.objects.values_list('id', flat=True)), {reciente.id, pendiente.id})
+
+
+class ArchiveOrdersTests(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user('vendedor', password='x')
+        self.buyer = User.objects.create_user('comprador', password='x')
+        product = Product.objects.create(
+            name='Mate', owner=seller.profile, category=Category.objects.create(name='Hogar'), stock=5, price=100,
+        )
+        self.vieja = crear_orden(self.buyer, product, 3, status='delivered')
+        self.activa = crear_orden(self.buyer, product, 1, status='delivered')
+        self.pendiente = crear_orden(self.buyer, product, 1)
+        hace_dos_meses = timezone.now() - timedelta(days=60)
+        Order.objects.filter(id__in=[self.vieja.id, self.pendiente.id]).update(updated_at=hace_dos_meses)
+
+    def test_copia_y_borra_solo_finalizadas_viejas(self):
+        self.assertEqual(archive_orders(days=30, batch_size=1), 1)
+
+        self.assertFalse(Order.objects.filter(id=self.vieja.id).exists())
+        self.assertEqual(set(Order.objects.values_list('id', flat=True)), {self.activa.id, self.pendiente.id})
+        archivada = ArchivedOrder.objects.get(id=self.vieja.id)
+        self.assertEqual((archivada.order_number, archivada.total), (self.vieja.order_number, 300))
+        item = archivada.items.get()
+        self.assertEqual((item.product_name, item.quantity, item.subtotal), ('Mate', 3, 300))
+        self.assertFalse(OrderItem.objects.filter(order_id=self.vieja.id).exists())
+
+    def test_historial_incluye_archivadas(self):
+        archive_orders(days=30)
+        self.client.force_login(self.buyer)
+
+        html = self.client.get(reverse('order_list')).content.decode()
+        self.assertNotIn(self.vieja.order_number, html)
+        self.assertIn(self.activa.order_number, html)
+
+        html = self.client.get(reverse('order_list') + '?historial=1').content.decode()
+        self.assertIn(self.vieja.order_number, html)
+        self.assertIn(self.activa.order_number, html)
+        self.assertEqual(self.client.get(reverse('order_detail', args=[self.vieja.id])).status_code, 200)
+
+
+class SalesCsvTests(TestCase):
+    def test_neutraliza_formulas(self):
+        seller = User.objects.create_user('vendedor', password='x')
+        buyer = User.objects.create_user('=HYPERLINK("http://x","y")', email='@malo@example.com', password='x')
+        product = Product.objects.create(
+            name='-Mate', owner=seller.profile, category=Category.objects.create(name='Hogar'), stock=5, price=100,
+        )
+        crear_orden(buyer, product)
+        self.client.force_login(seller)
+
+        response = self.client.get(reverse('export_sales_csv'))
+        _, row = csv.reader(b''.join(response.streaming_content).decode().splitlines())
+        self.assertEqual(row[3:6], ["'" + buyer.username, "'@malo@example.com", "'-Mate"])
+        self.assertEqual(row[6:], ['100.00', '1', '100.00'])
+
+
+class OrderStatusSyncTests(TestCase):
+    """Una orden con partes de dos vendedores"""
+
+    def setUp(self):
+        self.buyer = User.objects.create_user('comprador', password='x')
+        category = Category.objects.create(name='Hogar')
+        self.sellers, self.products = [], []
+        for name in ('ana', 'beto'):
+            seller = User.objects.create_user(name, password='x')
+            self.sellers.append(seller)
+            self.products.append(Product.objects.create(
+                name=f'Mate {name}', owner=seller.profile, category=category, stock=5, price=100,
+            ))
+        self.order = crear_orden(self.buyer, self.products[0], 2)
+        seller_order = SellerOrder.objects.create(order=self.order, seller=self.sellers[1], total=100, items_count=1)
+        OrderItem.objects.create(
+            order=self.order, seller_order=seller_order, product=self.products[1], seller=self.sellers[1],
+            product_name='Mate beto', product_price=100, quantity=1, subtotal=100,
+        )
+
+    def status(self):
+        parts = dict(SellerOrder.objects.filter(order=self.order).values_list('seller__username', 'status'))
+        return Order.objects.get(id=self.order.id).status, parts
+
+    def test_la_orden_avanza_con_la_parte_mas_atrasada(self):
+        self.assertEqual(transition_orders(self.sellers[0], [self.order.id], 'processing'), 1)
+        self.assertEqual(self.status(), ('pending', {'ana': 'processing', 'beto': 'pending'}))
+
+        transition_orders(self.sellers[1], [self.order.id], 'processing')
+        transition_orders(self.sellers[0], [self.order.id], 'shipped')
+        self.assertEqual(self.status(), ('processing', {'ana': 'shipped', 'beto': 'processing'}))
+
+        transition_orders(self.sellers[0], [self.order.id], 'delivered')
+        self.assertTrue(TradingPartner.objects.filter(buyer=self.buyer, seller=self.sellers[0]).exists())
+        self.assertFalse(TradingPartner.objects.filter(buyer=self.buyer, seller=self.sellers[1]).exists())
+
+    def test_cancelar_una_parte_y_despues_la_orden(self):
+        transition_orders(self.sellers[1], [self.order.id], 'cancelled')
+        self.assertEqual(self.status(), ('pending', {'ana': 'pending', 'beto': 'cancelled'}))
+
+        self.assertTrue(cancel_buyer_order(self.buyer, self.order.id))
+        self.assertEqual(self.status(), ('cancelled', {'ana': 'cancelled', 'beto': 'cancelled'}))
+        stocks = [Product.objects.get(id=p.id).stock for p in self.products]
+        self.assertEqual(stocks, [7, 6])  # cada parte devolvió su stock una sola vez
+
+    def test_cambio_desde_el_admin_sincroniza_las_partes(self):
+        transition_orders(self.sellers[1], [self.order.id], 'cancelled')
+        order = Order.objects.get(id=self.order.id)
+        order.status = 'delivered'
+        form = mock.Mock(changed_data=['status'], initial={'status': 'pending'})
+
+        OrderAdmin(Order, admin_site=None).save_model(None, order, form, change=True)
+
+        self.assertEqual(self.status(), ('delivered', {'ana': 'delivered', 'beto': 'cancelled'}))
+        self.assertTrue(TradingPartner.objects.filter(buyer=self.buyer, seller=self.sellers[0]).exists())
+        self.assertEqual(order.status, 'delivered')
+
+
+class ReviewsPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('vendedor', password='clave-de-prueba')
+        self.url = reverse('profile_reviews', args=[self.seller.username])
+        for i in range(12):
+            buyer = User.objects.create_user(f'comprador{i}', password='clave-de-prueba')
+            TradingPartner.registrar([(buyer.id, self.seller.id)])
+            Review.objects.create(autor=buyer, receptor=self.seller, calificacion=5, comentario=f'Bien {i}')
+        self.client.force_login(self.seller)
+
+    def test_recorre_las_paginas(self):
+        first = self.client.get(self.url).json()
+        second = self.client.get(self.url, {'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(first['reviews']), 10)
+        self.assertEqual(len(second['reviews']), 2)
+        self.assertIsNone(second['next_cursor'])
+
+    def test_cursor_invalido_devuelve_la_primera_pagina(self):
+        first = self.client.get(self.url).json()
+        for cursor in [encode_cursor(['zzz', 'y']), encode_cursor([None, 1]), encode_cursor(['x']), 'basura']:
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), first)
@@ -13,6 +13,8 @@ urlpatterns = [
     path('ventas/', views.seller_orders, name='seller_orders'),
     path('ventas/<int:order_id>/', views.seller_order_detail, name='seller_order_detail'),
     path('ventas/<int:order_id>/actualizar/', views.update_order_status, name='update_order_status'),
+    path('ventas/actualizar/', views.bulk_update_order_status, name='bulk_update_order_status'),
+    path('ventas/exportar/', views.export_sales_csv, name='export_sales_csv'),
 
     #Reviews
     path('review/<str:username>/', views.crear_review, name='crear_review'),
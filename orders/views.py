@@ -1,11 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from .models import Order, OrderItem, Review
+from django.db import transaction
+from . import outbox
+from .archive import get_order_or_archived, is_archived
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, Review, SellerOrder, TradingPartner
+from .state_machine import BULK_STATUSES, cancel_buyer_order, next_statuses, transition_orders
+from .stock import StockInsuficiente, reserve_stock
 from cart.models import Cart
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
@@ -14,13 +19,18 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from reportlab.pdfgen import canvas
 from io import BytesIO
+import csv
+from itertools import chain
+from collections import defaultdict
+from django.db.models import Count, Q
+from django.core.paginator import Paginator
 from datetime import datetime
 
 
 @login_required
 def checkout(request):
     """Página de checkout"""
-    cart = get_object_or_404(Cart, user=request.user)
+    cart, created = Cart.objects.get_or_create(user=request.user)
     
     if not cart.items.all():
         messages.error(request, 'Tu carrito está vacío')
@@ -40,7 +50,7 @@ def create_order(request):
     if request.method != 'POST':
         return redirect('checkout')
     
-    cart = get_object_or_404(Cart, user=request.user)
+    cart, created = Cart.objects.get_or_create(user=request.user)
     
     if not cart.items.all():
         messages.error(request, 'Tu carrito está vacío')
@@ -60,37 +70,54 @@ def create_order(request):
     shipping_cost = 0
     total = subtotal + shipping_cost
     
-    order = Order.objects.create(
-        user=request.user,
-        subtotal=subtotal,
-        shipping_cost=shipping_cost,
-        total=total,
-        shipping_address=shipping_address,
-        shipping_city=shipping_city,
-        shipping_country=shipping_country,
-        shipping_phone=shipping_phone,
-        payment_method=payment_method,
-        paid=True,
-        paid_at=timezone.now()
-    )
-    
-    for cart_item in cart.items.all():
-        OrderItem.objects.create(
-            order=order,
-            product=cart_item.product,
-            product_name=cart_item.product.name,
-            product_price=cart_item.product.price,
-            quantity=cart_item.quantity,
-            subtotal=cart_item.get_subtotal()
-        )
-        
-        product = cart_item.product
-        product.stock -= cart_item.quantity
-        if product.stock == 0:
-            product.on_stock = False
-        product.save()
-    
-    cart.items.all().delete()
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=request.user,
+                subtotal=subtotal,
+                shipping_cost=shipping_cost,
+                total=total,
+                shipping_address=shipping_address,
+                shipping_city=shipping_city,
+                shipping_country=shipping_country,
+                shipping_phone=shipping_phone,
+                payment_method=payment_method,
+                paid=True,
+                paid_at=timezone.now()
+            )
+            
+            # Una parte (SellerOrder) por vendedor, con su total precalculado
+            por_vendedor = defaultdict(list)
+            for cart_item in cart.items.select_related('product__owner'):
+                owner = cart_item.product.owner
+                por_vendedor[owner.user_id if owner else None].append(cart_item)
+            
+            for seller_id, cart_items in por_vendedor.items():
+                seller_order = SellerOrder.objects.create(
+                    order=order,
+                    seller_id=seller_id,
+                    total=sum(cart_item.get_subtotal() for cart_item in cart_items),
+                    items_count=len(cart_items),
+                    created_at=order.created_at,
+                )
+                for cart_item in cart_items:
+                    OrderItem.objects.create(
+                        order=order,
+                        seller_order=seller_order,
+                        seller_id=seller_id,
+                        product=cart_item.product,
+                        product_name=cart_item.product.name,
+                        product_price=cart_item.product.price,
+                        quantity=cart_item.quantity,
+                        subtotal=cart_item.get_subtotal()
+                    )
+                    reserve_stock(cart_item.product, cart_item.quantity)
+            
+            cart.items.all().delete()
+            outbox.publish('order.created', order_id=order.id, user_id=request.user.id)
+    except StockInsuficiente as e:
+        messages.error(request, str(e))
+        return redirect('cart_view')
     
     messages.success(request, f'¡Orden #{order.order_number} creada exitosamente!')
     return redirect('order_detail', order_id=order.id)
@@ -98,10 +125,16 @@ def create_order(request):
 @login_required
 def order_list(request):
 
+    historial = request.GET.get('historial') == '1'
+
     orders = Order.objects.filter(user=request.user).prefetch_related(
         'items__seller'
     ).order_by('-created_at')
     
+    if historial:
+        archived = ArchivedOrder.objects.filter(user=request.user).prefetch_related('items__seller')
+        orders = sorted(chain(orders, archived), key=lambda o: o.created_at, reverse=True)
+    
     for order in orders:
         for item in order.items.all():
             item.user_review = Review.objects.filter(
@@ -110,14 +143,15 @@ def order_list(request):
             ).first()
     
     context = {
-        'orders': orders
+        'orders': orders,
+        'historial': historial,
     }
     return render(request, 'orders/order_list.html', context)
 
 @login_required
 def order_detail(request, order_id):
     """Ver detalle de una orden"""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_order_or_archived(order_id, user=request.user)
     context = {
         'order': order
     }
@@ -128,17 +162,7 @@ def cancel_order(request, order_id):
     """Cancelar una orden"""
     order = get_object_or_404(Order, id=order_id, user=request.user)
     
-    if order.status in ['pending', 'processing']:
-        order.status = 'cancelled'
-        order.save()
-        
-        # Devolver stock
-        for item in order.items.all():
-            product = item.product
-            product.stock += item.quantity
-            product.on_stock = True
-            product.save()
-        
+    if cancel_buyer_order(request.user, order.id):
         messages.success(request, 'Orden cancelada exitosamente')
     else:
         messages.error(request, 'No se puede cancelar esta orden')
@@ -148,30 +172,53 @@ def cancel_order(request, order_id):
 @login_required
 def seller_orders(request):
     """Ver pedidos de productos del vendedor"""
-    seller_profile = request.user.profile
-    
-    order_items = OrderItem.objects.filter(
-        product__owner=seller_profile
-    ).select_related('order', 'product').order_by('-order__created_at')
-    
-    orders_dict = {}
-    for item in order_items:
-        order = item.order
-        if order.id not in orders_dict:
-            orders_dict[order.id] = {
-                'order': order,
-                'items': [],
-                'seller_total': 0
-            }
-        orders_dict[order.id]['items'].append(item)
-        orders_dict[order.id]['seller_total'] += item.subtotal
-    
-    orders = list(orders_dict.values())
+    historial = request.GET.get('historial') == '1'
+    
+    seller_orders = SellerOrder.objects.filter(
+        seller=request.user
+    ).select_related('order__user').order_by('-created_at')
+    
+    orders = [
+        {
+            'order': so.order,
+            'status': so.status,
+            'items_count': so.items_count,
+            'seller_total': so.total,
+        }
+        for so in seller_orders
+    ]
+    
+    if historial:
+        archived_items = ArchivedOrderItem.objects.filter(
+            seller=request.user
+        ).select_related('order__user')
+        
+        archived = {}
+        for item in archived_items:
+            order = item.order
+            if order.id not in archived:
+                archived[order.id] = {
+                    'order': order,
+                    'status': order.status,
+                    'items_count': 0,
+                    'seller_total': 0
+                }
+            archived[order.id]['items_count'] += 1
+            archived[order.id]['seller_total'] += item.subtotal
+        
+        orders = sorted(chain(orders, archived.values()), key=lambda o: o['order'].created_at, reverse=True)
+    
+    counts = dict(
+        SellerOrder.objects.filter(seller=request.user)
+        .values_list('status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
     
     total_orders = len(orders)
-    pending_count = sum(1 for o in orders if o['order'].status == 'pending')
-    processing_count = sum(1 for o in orders if o['order'].status == 'processing')
-    delivered_count = sum(1 for o in orders if o['order'].status == 'delivered')
+    pending_count = counts.get('pending', 0)
+    processing_count = counts.get('processing', 0)
+    delivered_count = counts.get('delivered', 0)
     
     context = {
         'orders': orders,
@@ -179,30 +226,110 @@ def seller_orders(request):
         'pending_count': pending_count,
         'processing_count': processing_count,
         'delivered_count': delivered_count,
+        'historial': historial,
     }
     return render(request, 'orders/seller_orders.html', context)
 
+class Echo:
+    """Buffer mínimo para csv.writer: devuelve la línea en vez de guardarla"""
+    def write(self, value):
+        return value
+
+
+SALES_CSV_HEADER = [
+    'Orden', 'Fecha', 'Estado', 'Cliente', 'Email', 'Producto', 'Precio unitario', 'Cantidad', 'Subtotal',
+]
+SALES_CSV_FIELDS = [
+    'order__order_number', 'order__created_at', 'seller_order__status', 'order__user__username',
+    'order__user__email', 'product_name', 'product_price', 'quantity', 'subtotal',
+]
+ARCHIVED_SALES_CSV_FIELDS = [
+    'order__order_number', 'order__created_at', 'order__status', 'order__user__username',
+    'order__user__email', 'product_name', 'product_price', 'quantity', 'subtotal',
+]
+
+
+# Una celda que empieza con estos caracteres la planilla la toma como fórmula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _celda_segura(value):
+    """Texto cargado por usuarios (nombre, email, producto) como texto literal"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+@login_required
+def export_sales_csv(request):
+    """Descargar las ventas del vendedor en CSV, generado de a partes"""
+    desde = _parse_date(request.GET.get('desde'))
+    hasta = _parse_date(request.GET.get('hasta'))
+    
+    filters = {}
+    if desde:
+        filters['order__created_at__date__gte'] = desde
+    if hasta:
+        filters['order__created_at__date__lte'] = hasta
+    
+    # Sólo tuplas, sin instanciar modelos: la memoria no crece con la cantidad de filas
+    rows = chain(
+        OrderItem.objects.filter(seller_order__seller=request.user, **filters)
+        .order_by('order__created_at', 'id')
+        .values_list(*SALES_CSV_FIELDS)
+        .iterator(chunk_size=2000),
+        ArchivedOrderItem.objects.filter(seller=request.user, **filters)
+        .order_by('order__created_at', 'id')
+        .values_list(*ARCHIVED_SALES_CSV_FIELDS)
+        .iterator(chunk_size=2000),
+    )
+    
+    writer = csv.writer(Echo())
+    
+    def generate():
+        yield writer.writerow(SALES_CSV_HEADER)
+        for row in rows:
+            yield writer.writerow([_celda_segura(value) for value in row])
+    
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="ventas_{request.user.username}.csv"'
+    return response
+
 @login_required
 def seller_order_detail(request, order_id):
     """Ver detalle de un pedido como vendedor"""
-    order = get_object_or_404(Order, id=order_id)
-    seller_profile = request.user.profile
-    
-    seller_items = OrderItem.objects.filter(
-        order=order,
-        product__owner=seller_profile
-    )
+    seller_order = SellerOrder.objects.filter(
+        order_id=order_id, seller=request.user
+    ).select_related('order__user').first()
+    
+    if seller_order:
+        order = seller_order.order
+        seller_items = list(seller_order.items.select_related('product'))
+        seller_status = seller_order.status
+        seller_total = seller_order.total
+    else:
+        order = get_order_or_archived(order_id)
+        seller_items = list(order.items.filter(seller=request.user)) if is_archived(order) else []
+        seller_status = order.status
+        seller_total = sum(item.subtotal for item in seller_items)
     
-    if not seller_items.exists():
+    if not seller_items:
         messages.error(request, 'No tienes productos en esta orden')
         return redirect('seller_orders')
     
-    seller_total = sum(item.subtotal for item in seller_items)
-    
     context = {
         'order': order,
         'seller_items': seller_items,
-        'seller_total': seller_total
+        'seller_total': seller_total,
+        'seller_status': seller_status,
+        'next_statuses': next_statuses(seller_status),
     }
     return render(request, 'orders/seller_order_detail.html', context)
 
@@ -213,27 +340,40 @@ def update_order_status(request, order_id):
         return redirect('seller_orders')
     
     order = get_object_or_404(Order, id=order_id)
-    seller_profile = request.user.profile
-    
-    seller_items = OrderItem.objects.filter(
-        order=order,
-        product__owner=seller_profile
-    )
+    new_status = request.POST.get('status')
     
-    if not seller_items.exists():
+    if transition_orders(request.user, [order.id], new_status):
+        messages.success(request, f'Estado actualizado a {dict(Order.STATUS_CHOICES)[new_status]}')
+    elif not SellerOrder.objects.filter(order=order, seller=request.user).exists():
         messages.error(request, 'No tienes permisos para modificar esta orden')
         return redirect('seller_orders')
+    else:
+        messages.error(request, 'Estado inválido')
+    
+    return redirect('seller_order_detail', order_id=order.id)
+
+@login_required
+def bulk_update_order_status(request):
+    """Actualizar el estado de varias órdenes a la vez (solo vendedores)"""
+    if request.method != 'POST':
+        return redirect('seller_orders')
     
     new_status = request.POST.get('status')
+    order_ids = [int(i) for i in request.POST.getlist('order_ids') if i.isdigit()]
     
-    if new_status in dict(Order.STATUS_CHOICES).keys():
-        order.status = new_status
-        order.save()
-        messages.success(request, f'Estado actualizado a {order.get_status_display()}')
-    else:
+    if new_status not in BULK_STATUSES:
         messages.error(request, 'Estado inválido')
+        return redirect('seller_orders')
     
-    return redirect('seller_order_detail', order_id=order.id)
+    updated = transition_orders(request.user, order_ids, new_status)
+    skipped = len(set(order_ids)) - updated
+    
+    if updated:
+        messages.success(request, f'{updated} orden(es) actualizadas a {dict(Order.STATUS_CHOICES)[new_status]}')
+    if skipped:
+        messages.warning(request, f'{skipped} orden(es) no se pudieron actualizar a ese estado')
+    
+    return redirect('seller_orders')
 
 
 @login_required
@@ -245,17 +385,7 @@ def crear_review(request, username):
         messages.error(request, 'No puedes dejarte una review a ti mismo.')
         return redirect('profile_view_user', username=username)
     
-    compro_a = OrderItem.objects.filter(
-        order__user=request.user,
-        seller=receptor,
-        order__status='delivered'
-    ).exists()
-    
-    vendio_a = OrderItem.objects.filter(
-        order__user=receptor,
-        seller=request.user,
-        order__status='delivered'
-    ).exists()
+    compro_a, vendio_a = TradingPartner.entre(request.user, receptor)
     
     if not (compro_a or vendio_a):
         messages.error(request, 'Debes tener al menos una compra/venta completada con este usuario para dejar una review.')
@@ -298,61 +428,42 @@ def crear_review(request, username):
 @login_required
 def mis_reviews_pendientes(request):
     """Lista de usuarios con los que puedes dejar review"""
-
-    usuarios = set()
-
-    # Usuarios a los que les compraste productos (vendedores)
-    vendidos = OrderItem.objects.filter(
-        order__user=request.user,
-        order__status='delivered'
-    ).values_list('seller', flat=True)
-    print("IDs de vendedores:", list(vendidos))  # DEBUG
-
-    for user_id in vendidos:
-        usuario = User.objects.get(id=user_id)
-        print("Vendedor agregado:", usuario.username)  # DEBUG
-        usuarios.add(usuario)
-
-    # Usuarios que te compraron productos (compradores)
-    compraron = OrderItem.objects.filter(
-        seller=request.user,
-        order__status='delivered'
-    ).values_list('order__user', flat=True)
-    print("IDs de compradores:", list(compraron))  # DEBUG
-
-    for user_id in compraron:
-        usuario = User.objects.get(id=user_id)
-        print("Comprador agregado:", usuario.username)  # DEBUG
-        usuarios.add(usuario)
-
-    # Agregar atributo mi_review a cada usuario
+    
+    # Usuarios a los que les compraste (vendedores) o que te compraron (compradores)
+    contrapartes = User.objects.filter(
+        Q(id__in=TradingPartner.objects.filter(buyer=request.user).values('seller_id')) |
+        Q(id__in=TradingPartner.objects.filter(seller=request.user).values('buyer_id'))
+    ).select_related('profile').order_by('username')
+    
+    paginator = Paginator(contrapartes, 24)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    usuarios = list(page_obj)
+    
+    # Mis reviews para los usuarios de esta página, en una sola consulta
+    mis_reviews = {
+        review.receptor_id: review
+        for review in Review.objects.filter(autor=request.user, receptor__in=usuarios)
+    }
     for usuario in usuarios:
-        review = Review.objects.filter(
-            autor=request.user,
-            receptor=usuario
-        ).first()
-        usuario.mi_review = review
-        print(f"Usuario: {usuario.username}, mi_review:", review)  # DEBUG
-
+        usuario.mi_review = mis_reviews.get(usuario.id)
+    
     context = {
         'usuarios': usuarios,
+        'page_obj': page_obj,
     }
-
-    print("Usuarios finales en contexto:", [u.username for u in usuarios])  # DEBUG
-
     return render(request, 'reviews/pendientes_review.html', context)
 
 @login_required
 def download_receipt_pdf(request, order_id):
     """Generar y descargar recibo en PDF"""
-    order = get_object_or_404(Order, id=order_id)
+    order = get_order_or_archived(order_id)
     
     # Verificar que el usuario sea el comprador o vendedor
     is_buyer = order.user == request.user
-    is_seller = OrderItem.objects.filter(
-        order=order,
-        product__owner=request.user.profile
-    ).exists()
+    if is_archived(order):
+        is_seller = order.items.filter(seller=request.user).exists()
+    else:
+        is_seller = SellerOrder.objects.filter(order=order, seller=request.user).exists()
     
     if not (is_buyer or is_seller):
         messages.error(request, 'No tienes permiso para ver este recibo')
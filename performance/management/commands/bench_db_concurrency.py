@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from marketplace.benchmarks import percentile, test_database
+from products.models import Category, Product
+
+from .bench_views import ORDER_DATA
+
+
+class Command(BaseCommand):
+    help = ('Mide compras y lecturas simultáneas contra la base del perfil actual (DB_PROFILE). '
+            'Correrlo con DB_PROFILE=sqlite (por defecto) y DB_PROFILE=sqlite-tuned para compararlos')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=20, help='Ciclos lectura+compra por hilo')
+        parser.add_argument('--reads', type=int, default=3, help='Lecturas de product_list por compra')
+
+    def handle(self, *args, **options):
+        profile = os.environ.get('DB_PROFILE', 'sqlite')
+        with test_database(), override_settings(PERF_INSTRUMENTATION=True, PERF_LOG_FILE=None):
+            with connection.cursor() as cursor:
+                journal = (
+                    cursor.execute('PRAGMA journal_mode').fetchone()[0] if connection.vendor == 'sqlite' else '-'
+                )
+            latencies, errors, elapsed = self._run(options)
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(
+            f"Perfil {profile} ({connection.vendor}, journal {journal}, "
+            f"CONN_MAX_AGE {settings.DATABASES['default']['CONN_MAX_AGE']})"
+        )
+        for name, values in sorted(latencies.items()):
+            self.stdout.write(
+                f'{name:<14} {len(values):>6} ops  p50 {percentile(values, 50):>8.2f} ms  '
+                f'p95 {percentile(values, 95):>8.2f} ms  p99 {percentile(values, 99):>8.2f} ms'
+            )
+        self.stdout.write(f'{total} operaciones en {elapsed:.2f} s ({total / elapsed:.1f} ops/s)')
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(f'{len(errors)} error(es)'))
+        for error in sorted(set(errors))[:5]:
+            self.stdout.write(f'  {error}')
+
+    def _run(self, options):
+        threads = options['threads']
+        seller = User.objects.create_user('bench_vendedor', password='clave-de-prueba')
+        category = Category.objects.create(name='Bench')
+        products = Product.objects.bulk_create(
+            Product(name=f'Producto {i}', description='-', price=100 + i, stock=100000,
+                    category=category, owner=seller.profile)
+            for i in range(50)
+        )
+        buyers = [User.objects.create_user(f'bench_comprador{i}', password='clave-de-prueba') for i in range(threads)]
+
+        latencies = defaultdict(list)
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def timed(name, call):
+            start = time.perf_counter()
+            try:
+                response = call()
+            except Exception as e:
+                with lock:
+                    errors.append(f'{name}: {e}')
+                return
+            ms = (time.perf_counter() - start) * 1000
+            with lock:
+                if response.status_code >= 500:
+                    errors.append(f'{name}: respuesta {response.status_code}')
+                else:
+                    latencies[name].append(ms)
+
+        def worker(index, buyer):
+            try:
+                client = Client(raise_request_exception=False)
+                client.force_login(buyer)
+                barrier.wait()
+                for i in range(options['iterations']):
+                    for _ in range(options['reads']):
+                        timed('product_list', lambda: client.get(reverse('product_list')))
+                    product = products[(index + i) % len(products)]
+                    timed('cart_add', lambda: client.post(reverse('cart_add', args=[product.id])))
+                    timed('create_order', lambda: client.post(reverse('create_order'), ORDER_DATA))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i, buyer)) for i, buyer in enumerate(buyers)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return latencies, errors, time.perf_counter() - start
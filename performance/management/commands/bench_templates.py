@@ -0,0 +1,94 @@
+import copy
+import json
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from marketplace.benchmarks import percentile, test_database
+from performance import synthetic
+from performance.middleware import request_log
+from products.models import Product
+
+
+def _templates(cached_loader):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    loaders = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+    templates[0]['OPTIONS']['loaders'] = (
+        [('django.template.loaders.cached.Loader', loaders)] if cached_loader else loaders
+    )
+    return templates
+
+
+# (nombre, loader cacheado, FRAGMENT_CACHE_TIMEOUT)
+CONFIGS = [
+    ('sin cache', False, 0),
+    ('loader cacheado', True, 0),
+    ('loader + fragmentos', True, 600),
+]
+
+
+class _Collector(logging.Handler):
+    """Junta los registros que escribe performance.middleware por request"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+
+class Command(BaseCommand):
+    help = ('Mide el tiempo de render de home, product_list y product_detail con y sin '
+            'loader cacheado y cache de fragmentos, sobre datos sintéticos')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=30)
+        parser.add_argument('--users', type=int, default=150)
+
+    def handle(self, *args, **options):
+        with test_database(), override_settings(PERF_LOG_FILE=None, PERF_INSTRUMENTATION=True):
+            synthetic.generate(users=options['users'])
+            buyer = User.objects.filter(username__startswith=synthetic.USERNAME_PREFIX,
+                                        profile__products__isnull=True).order_by('id').first()
+            product = Product.objects.order_by('id').first()
+            urls = [
+                ('home', reverse('home')),
+                ('product_list', reverse('product_list')),
+                ('product_detail', reverse('product_detail', args=[product.id])),
+            ]
+
+            collector = _Collector()
+            request_log.addHandler(collector)
+            old_level = request_log.level
+            request_log.setLevel(logging.INFO)
+            try:
+                for config, cached_loader, timeout in CONFIGS:
+                    with override_settings(TEMPLATES=_templates(cached_loader), FRAGMENT_CACHE_TIMEOUT=timeout):
+                        cache.clear()
+                        client = Client()
+                        client.force_login(buyer)
+                        for name, url in urls:
+                            client.get(url)  # calentar
+                            collector.records.clear()
+                            for _ in range(options['runs']):
+                                client.get(url)
+                            self._report(f'{name} ({config})', collector.records)
+            finally:
+                request_log.removeHandler(collector)
+                request_log.setLevel(old_level)
+
+    def _report(self, name, records):
+        records = [json.loads(line) for line in records]
+        render = [r['render_ms'] for r in records]
+        total = [r['total_ms'] for r in records]
+        queries = sum(r['queries'] for r in records) / len(records)
+        self.stdout.write(
+            f'{name:<40} render p50 {percentile(render, 50):>7.2f} ms  p95 {percentile(render, 95):>7.2f} ms  '
+            f'total p50 {percentile(total, 50):>7.2f} ms  {queries:>5.1f} consultas'
+        )
@@ -0,0 +1,148 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from cart.models import CartItem
+from marketplace.benchmarks import Measurement, test_database
+from performance import synthetic
+from products.models import Category, Product, SubCategory
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'performance', 'baseline.json')
+
+ORDER_DATA = {
+    'shipping_address': 'Calle Falsa 123',
+    'shipping_city': 'Córdoba',
+    'shipping_country': 'Argentina',
+    'shipping_phone': '1122334455',
+    'payment_method': 'transfer',
+}
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y consultas de las vistas principales sobre datos sintéticos y compara con un baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=30)
+        parser.add_argument('--users', type=int, default=150)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help='Guarda los resultados como nuevo baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Aumento relativo de p50 tolerado respecto del baseline')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        overrides = {'PERF_INSTRUMENTATION': True, 'PERF_LOG_FILE': None, 'PERF_BUDGET_MODE': 'warn'}
+        with test_database(), override_settings(**overrides):
+            synthetic.generate(users=options['users'], seed=options['seed'])
+            results = [m.summary() for m in self._measure(options['runs'])]
+
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<36} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                f"{result['queries']:>5} consultas"
+            )
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as fh:
+                json.dump({r['name']: r for r in results}, fh, indent=2, sort_keys=True)
+                fh.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline guardado en {options['baseline']}"))
+            return
+
+        regressions = self._compare(results, options['baseline'], options['tolerance'])
+        for line in regressions:
+            self.stdout.write(self.style.WARNING(line))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regresión(es) respecto del baseline')
+
+    def _scenarios(self):
+        """Devuelve [(nombre, usuario, método, url, datos)] sobre el dataset generado"""
+        seller = User.objects.get(username=f'{synthetic.USERNAME_PREFIX}00000')
+        buyer = User.objects.filter(
+            username__startswith=synthetic.USERNAME_PREFIX, orders__isnull=False, profile__products__isnull=True,
+        ).order_by('id').first()
+        product = Product.objects.filter(owner__user__username__startswith=synthetic.USERNAME_PREFIX).order_by('id').first()
+        category = Category.objects.filter(name__startswith=synthetic.CATEGORY_PREFIX).order_by('id').first()
+        subcategory = SubCategory.objects.filter(category=category).order_by('id').first()
+        product_list = reverse('product_list')
+
+        filters = [
+            ('sin filtros', ''),
+            ('search', '?search=mate'),
+            ('category', f'?category={category.id}'),
+            ('subcategory', f'?category={category.id}&subcategory={subcategory.id}'),
+            ('brand', '?brand=Acme'),
+            ('precio', '?min_price=100&max_price=1000'),
+            ('tipo_venta', '?tipo_venta=intercambio'),
+            ('solo_ofertas', '?solo_ofertas=true'),
+            ('mostrar_agotados', '?mostrar_agotados=true'),
+            ('orden favoritos', '?orden=favoritos'),
+            ('página 2', '?page=2'),
+        ]
+        return buyer, product, [
+            ('home', buyer, 'get', reverse('home'), None),
+            *[(f'product_list {name}', buyer, 'get', product_list + query, None) for name, query in filters],
+            ('product_detail', buyer, 'get', reverse('product_detail', args=[product.id]), None),
+            ('cart_view', buyer, 'get', reverse('cart_view'), None),
+            ('checkout', buyer, 'get', reverse('checkout'), None),
+            ('create_order', buyer, 'post', reverse('create_order'), ORDER_DATA),
+            ('order_list', buyer, 'get', reverse('order_list'), None),
+            ('seller_orders', seller, 'get', reverse('seller_orders'), None),
+        ]
+
+    def _measure(self, runs):
+        buyer, product, scenarios = self._scenarios()
+        clients = {}
+        measurements = []
+        for name, user, method, url, data in scenarios:
+            if user.id not in clients:
+                clients[user.id] = Client()
+                clients[user.id].force_login(user)
+            client = clients[user.id]
+
+            measurement = Measurement(name)
+            for i in range(runs + 1):
+                # create_order vacía el carrito: se vuelve a llenar fuera de la medición
+                self._fill_cart(buyer, product)
+                if i == 0:
+                    response = getattr(client, method)(url, data)  # calentar cache y plantillas
+                    if response.status_code not in (200, 302):
+                        raise CommandError(f'{name}: respuesta {response.status_code}')
+                    continue
+                with measurement.run():
+                    getattr(client, method)(url, data)
+            measurements.append(measurement)
+        return measurements
+
+    def _fill_cart(self, buyer, product):
+        Product.objects.filter(id=product.id).update(stock=1000, on_stock=True)
+        if not CartItem.objects.filter(cart__user=buyer).exists():
+            CartItem.objects.create(cart=buyer.cart, product=product, quantity=1)
+
+    def _compare(self, results, path, tolerance):
+        if not os.path.exists(path):
+            self.stdout.write(f'No hay baseline en {path}; usá --save-baseline para crearlo')
+            return []
+        with open(path, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+
+        regressions = []
+        for result in results:
+            previous = baseline.get(result['name'])
+            if previous is None:
+                continue
+            if result['queries'] > previous['queries']:
+                regressions.append(
+                    f"{result['name']}: {result['queries']} consultas (baseline {previous['queries']})"
+                )
+            if result['p50_ms'] > previous['p50_ms'] * (1 + tolerance):
+                regressions.append(
+                    f"{result['name']}: p50 {result['p50_ms']} ms (baseline {previous['p50_ms']} ms)"
+                )
+        return regressions
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from performance import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Genera un dataset sintético determinístico (usuarios, productos, pedidos, reviews, favoritos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--products-per-seller', type=int, default=10)
+        parser.add_argument('--orders-per-buyer', type=int, default=3)
+        parser.add_argument('--categories', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--reset', action='store_true', help='Borra antes los datos sintéticos existentes')
+
+    def handle(self, *args, **options):
+        if synthetic.exists():
+            if not options['reset']:
+                raise CommandError('Ya hay datos sintéticos; usá --reset para regenerarlos')
+            synthetic.reset()
+
+        counts = synthetic.generate(
+            users=options['users'],
+            products_per_seller=options['products_per_seller'],
+            orders_per_buyer=options['orders_per_buyer'],
+            categories=options['categories'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        for name, count in counts.items():
+            self.stdout.write(f'{name:<12} {count:>8}')
+        self.stdout.write(self.style.SUCCESS(f'Datos generados (usuarios {synthetic.USERNAME_PREFIX}*, '
+                                             f'contraseña {synthetic.PASSWORD})'))
@@ -0,0 +1,63 @@
+import glob
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = 'Resume el log de requests: p50/p95 de tiempo y consultas por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help='Por defecto PERF_LOG_FILE (incluye los rotados por logrotate)')
+        parser.add_argument('--sort', choices=['p95_ms', 'p95_queries', 'requests'], default='p95_ms')
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.PERF_LOG_FILE
+        if not path:
+            raise CommandError('No hay archivo de log configurado (PERF_LOG_FILE)')
+        files = sorted(glob.glob(f'{path}*'))
+        if not files:
+            raise CommandError(f'No existe {path}')
+
+        endpoints = defaultdict(lambda: {'total_ms': [], 'queries': [], 'sql_ms': [], 'render_ms': [], 'dups': 0})
+        for name in files:
+            with open(name, encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    data = endpoints[record.get('url_name') or record.get('path')]
+                    for field in ('total_ms', 'queries', 'sql_ms', 'render_ms'):
+                        data[field].append(record.get(field, 0))
+                    data['dups'] = max(data['dups'], max((d['count'] for d in record.get('duplicates', [])), default=0))
+
+        rows = []
+        for name, data in endpoints.items():
+            rows.append({
+                'endpoint': name,
+                'requests': len(data['total_ms']),
+                'p50_ms': percentile(data['total_ms'], 50),
+                'p95_ms': percentile(data['total_ms'], 95),
+                'p50_queries': percentile(data['queries'], 50),
+                'p95_queries': percentile(data['queries'], 95),
+                'p95_sql_ms': percentile(data['sql_ms'], 95),
+                'p95_render_ms': percentile(data['render_ms'], 95),
+                'max_dups': data['dups'],
+            })
+        rows.sort(key=lambda row: row[options['sort']], reverse=True)
+
+        self.stdout.write(
+            f"{'endpoint':<34} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p50 q':>6} {'p95 q':>6} "
+            f"{'p95 sql':>9} {'p95 rend':>9} {'dup':>5}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{str(row['endpoint']):<34} {row['requests']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                f"{row['p50_queries']:>6} {row['p95_queries']:>6} {row['p95_sql_ms']:>9.1f} "
+                f"{row['p95_render_ms']:>9.1f} {row['max_dups']:>5}"
+            )
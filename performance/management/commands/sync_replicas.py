@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = ('Copia la base SQLite primaria a cada réplica local (DATABASE_REPLICAS). '
+            'Simula la replicación en desarrollo; con PostgreSQL la hace el servidor')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if not primary['ENGINE'].endswith('sqlite3'):
+            raise CommandError('sync_replicas solo sirve para réplicas SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No hay réplicas configuradas (DB_REPLICAS)')
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: {settings.DATABASES[alias]['NAME']}")
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f'{len(settings.DATABASE_REPLICAS)} réplica(s) sincronizadas'))
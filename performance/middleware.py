@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import time
+from contextlib import ExitStack
+from logging.handlers import WatchedFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from .stats import RequestStats, current_stats
+
+logger = logging.getLogger('performance.budgets')
+request_log = logging.getLogger('performance.requests')
+request_log.propagate = False
+
+
+class QueryBudgetExceeded(Exception):
+    """Una vista superó su presupuesto de consultas o de tiempo"""
+
+
+def _setup_request_log():
+    path = settings.PERF_LOG_FILE
+    if not path or request_log.handlers:
+        return
+    directory = os.path.dirname(path)
+    if directory:  # Un nombre suelto ('requests.log') va al directorio actual
+        os.makedirs(directory, exist_ok=True)
+    # Con varios workers escribiendo el mismo archivo, rotar desde el proceso
+    # pisa archivos; se rota afuera y el handler reabre el archivo nuevo
+    handler = WatchedFileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    request_log.addHandler(handler)
+    request_log.setLevel(logging.INFO)
+
+
+def check_budget(record):
+    """Compara el registro con PERF_BUDGETS. Devuelve la lista de excesos"""
+    budget = settings.PERF_BUDGETS.get(record['url_name'])
+    if not budget:
+        return []
+    excesses = []
+    if 'queries' in budget and record['queries'] > budget['queries']:
+        excesses.append(f"{record['queries']} consultas (máximo {budget['queries']})")
+    if 'sql_ms' in budget and record['sql_ms'] > budget['sql_ms']:
+        excesses.append(f"{record['sql_ms']} ms de SQL (máximo {budget['sql_ms']})")
+    if 'duplicates' in budget:
+        repeated = max((d['count'] for d in record['duplicates']), default=0)
+        if repeated > budget['duplicates']:
+            excesses.append(f"una consulta repetida {repeated} veces (máximo {budget['duplicates']})")
+    return excesses
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Mide cada request: cantidad de consultas, tiempo de SQL, consultas
+    repetidas (por huella) y tiempo de render, agrupado por nombre de URL.
+    Escribe una línea JSON por request en PERF_LOG_FILE y controla PERF_BUDGETS.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _setup_request_log()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'ts': timezone.now().isoformat(),
+            'url_name': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.queries,
+            'sql_ms': round(stats.sql_time * 1000, 2),
+            'render_ms': round(stats.render_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'duplicates': stats.duplicates(),
+        }
+        request_log.info(json.dumps(record))
+
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f'sql;dur={record["sql_ms"]};desc="{stats.queries} consultas", '
+                f'render;dur={record["render_ms"]}, total;dur={record["total_ms"]}'
+            )
+
+        excesses = check_budget(record)
+        if excesses:
+            message = f'{record["url_name"]} superó su presupuesto: ' + ', '.join(excesses)
+            if settings.PERF_BUDGET_MODE == 'fail':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,94 @@
+"""
+Router primaria + réplicas de lectura.
+
+Las escrituras van siempre a 'default' y las lecturas se reparten al azar
+entre DATABASE_REPLICAS. Para leer lo que uno mismo escribió:
+
+- dentro de una transacción se lee de la primaria;
+- en un request que escribió (o que no es GET/HEAD/OPTIONS), todas las
+  lecturas siguientes van a la primaria;
+- después de escribir se deja una cookie por REPLICA_STICKY_SECONDS, así el
+  GET que sigue al redirect (por ejemplo product_edit -> product_detail)
+  también lee de la primaria mientras la réplica se pone al día.
+
+Sin réplicas configuradas el router no interviene.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'db_primaria'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class _State:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Fuerza las lecturas a la primaria dentro del bloque"""
+    token = _state.set(_State(pinned=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return None
+        state = _state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación, no por migrate
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaStickinessMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        state = _State(pinned=request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,49 @@
+"""
+Métricas de un request: consultas SQL, tiempo de SQL y tiempo de render.
+
+El middleware crea un RequestStats por request y lo deja en un ContextVar;
+el execute_wrapper de cada conexión y el backend de plantillas acumulan ahí.
+"""
+import hashlib
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+current_stats = ContextVar('performance_stats', default=None)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Forma de la consulta sin parámetros: dos consultas con la misma huella son un N+1"""
+    normalized = _WHITESPACE.sub(' ', _IN_LIST.sub('IN (...)', sql)).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.fingerprints = Counter()
+        self.examples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: mide cada consulta que pasa por la conexión"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            key, normalized = fingerprint(sql)
+            self.fingerprints[key] += 1
+            self.examples.setdefault(key, normalized[:300])
+
+    def duplicates(self, limit=5):
+        return [
+            {'fingerprint': key, 'count': count, 'sql': self.examples[key]}
+            for key, count in self.fingerprints.most_common(limit) if count > 1
+        ]
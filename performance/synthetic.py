@@ -0,0 +1,199 @@
+"""
+Generador determinístico de datos sintéticos.
+
+Con la misma semilla y los mismos tamaños genera siempre los mismos datos.
+Todo se inserta con bulk_create, así que no corren las señales: perfiles,
+carritos, reputación y favorites_count se completan acá explícitamente.
+"""
+import io
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Profile
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem, Review, SellerOrder, TradingPartner
+from products.models import Category, Product, SubCategory
+from wishlist.models import Favorito
+
+USERNAME_PREFIX = 'synth_'
+CATEGORY_PREFIX = 'Sintética '
+PASSWORD = 'synthetic-pass'
+
+BRANDS = ['Genérico', 'Acme', 'Norte', 'Patagonia', 'Delta', 'Andina', 'Litoral', 'Pampa']
+WORDS = ['mate', 'termo', 'libro', 'lámpara', 'silla', 'mochila', 'campera', 'bici',
+         'parlante', 'teclado', 'monitor', 'taza', 'reloj', 'guitarra', 'planta', 'zapatillas']
+CITIES = ['Córdoba', 'Rosario', 'Mendoza', 'La Plata', 'Salta', 'Neuquén']
+STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'delivered', 'delivered', 'cancelled']
+
+
+def exists():
+    return User.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+
+
+def reset():
+    """Borra los datos sintéticos (en cascada desde usuarios y categorías)"""
+    with transaction.atomic():
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        Category.objects.filter(name__startswith=CATEGORY_PREFIX).delete()
+
+
+def generate(users=200, products_per_seller=10, orders_per_buyer=3, categories=8, seed=42, batch_size=1000):
+    """Crea el dataset y devuelve un dict con la cantidad de filas por modelo"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(PASSWORD, salt='synthetic')
+    counts = {}
+
+    with transaction.atomic():
+        user_objs = User.objects.bulk_create(
+            [User(username=f'{USERNAME_PREFIX}{i:05d}', email=f'{USERNAME_PREFIX}{i:05d}@example.com',
+                  password=password, first_name=f'Usuario {i}') for i in range(users)],
+            batch_size=batch_size,
+        )
+        profiles = Profile.objects.bulk_create([Profile(user=user) for user in user_objs], batch_size=batch_size)
+        carts = Cart.objects.bulk_create([Cart(user=user) for user in user_objs], batch_size=batch_size)
+        counts['users'] = len(user_objs)
+
+        category_objs = Category.objects.bulk_create(
+            [Category(name=f'{CATEGORY_PREFIX}{i}', description='Datos de prueba') for i in range(categories)]
+        )
+        subcategory_objs = SubCategory.objects.bulk_create(
+            [SubCategory(category=category, name=f'Sub {category.id}-{j}')
+             for category in category_objs for j in range(4)]
+        )
+        counts['categories'] = len(category_objs)
+
+        # Un tercio de los usuarios vende
+        sellers = profiles[: max(1, users // 3)]
+        product_objs = []
+        for profile in sellers:
+            for _ in range(products_per_seller):
+                price = Decimal(rng.randint(500, 200000)) / 100
+                en_oferta = rng.random() < 0.2
+                product_objs.append(Product(
+                    name=f'{rng.choice(WORDS).capitalize()} {rng.randint(1, 9999)}',
+                    owner=profile,
+                    category=rng.choice(category_objs),
+                    description=' '.join(rng.choices(WORDS, k=20)),
+                    stock=rng.choice([0, 1, 3, 10, 50, 200]),
+                    price=price,
+                    brand=rng.choice(BRANDS),
+                    tipo_venta=rng.choice(['venta', 'venta', 'venta', 'intercambio', 'ambos']),
+                    en_oferta=en_oferta,
+                    porcentaje_descuento=rng.choice([10, 15, 25, 40]) if en_oferta else 0,
+                ))
+        for product in product_objs:
+            product.on_stock = product.stock > 0
+        product_objs = Product.objects.bulk_create(product_objs, batch_size=batch_size)
+        counts['products'] = len(product_objs)
+
+        subcategories_by_category = {}
+        for sub in subcategory_objs:
+            subcategories_by_category.setdefault(sub.category_id, []).append(sub)
+        Product.subcategories.through.objects.bulk_create(
+            [Product.subcategories.through(product_id=product.id, subcategory_id=sub.id)
+             for product in product_objs
+             for sub in rng.sample(subcategories_by_category[product.category_id], 2)],
+            batch_size=batch_size,
+        )
+
+        favoritos = {
+            (user.id, product.id)
+            for user in user_objs
+            for product in rng.sample(product_objs, min(len(product_objs), rng.randint(0, 8)))
+        }
+        Favorito.objects.bulk_create(
+            [Favorito(usuario_id=u, producto_id=p) for u, p in sorted(favoritos)], batch_size=batch_size,
+        )
+        counts['favoritos'] = len(favoritos)
+
+        cart_items = []
+        for cart in carts:
+            for product in rng.sample(product_objs, min(len(product_objs), rng.randint(0, 4))):
+                cart_items.append(CartItem(cart=cart, product=product, quantity=rng.randint(1, 3)))
+        CartItem.objects.bulk_create(cart_items, batch_size=batch_size)
+        counts['cart_items'] = len(cart_items)
+
+        counts.update(_generate_orders(rng, user_objs, product_objs, orders_per_buyer, now, batch_size))
+
+    # Agregados que normalmente mantienen las señales y las vistas
+    call_command('reconcile_reputation', stdout=io.StringIO())
+    Favorito.recontar()
+    return counts
+
+
+def _generate_orders(rng, user_objs, product_objs, orders_per_buyer, now, batch_size):
+    owner_user = dict(Profile.objects.filter(id__in={p.owner_id for p in product_objs}).values_list('id', 'user_id'))
+
+    orders, lines = [], []
+    for user in user_objs:
+        for _ in range(orders_per_buyer):
+            picked = rng.sample(product_objs, min(len(product_objs), rng.randint(1, 4)))
+            picked = [p for p in picked if owner_user[p.owner_id] != user.id]
+            if not picked:
+                continue
+            items = [(product, rng.randint(1, 3)) for product in picked]
+            subtotal = sum(product.get_precio_oferta() * qty for product, qty in items)
+            orders.append(Order(
+                user=user,
+                order_number=f'SYN{len(orders):012d}',
+                status=rng.choice(STATUSES),
+                subtotal=subtotal,
+                total=subtotal,
+                shipping_address=f'Calle {rng.randint(1, 9999)}',
+                shipping_city=rng.choice(CITIES),
+                shipping_country='Argentina',
+                shipping_phone=f'11{rng.randint(10000000, 99999999)}',
+                payment_method=rng.choice(['credit_card', 'debit_card', 'paypal', 'transfer']),
+                paid=True,
+                paid_at=now,
+            ))
+            lines.append(items)
+    orders = Order.objects.bulk_create(orders, batch_size=batch_size)
+
+    seller_orders, grouped = [], []
+    for order, items in zip(orders, lines):
+        by_seller = {}
+        for product, qty in items:
+            by_seller.setdefault(owner_user[product.owner_id], []).append((product, qty))
+        for seller_id, seller_items in by_seller.items():
+            seller_orders.append(SellerOrder(
+                order=order, seller_id=seller_id, status=order.status,
+                total=sum(product.get_precio_oferta() * qty for product, qty in seller_items),
+                items_count=len(seller_items), created_at=now,
+            ))
+            grouped.append(seller_items)
+    seller_orders = SellerOrder.objects.bulk_create(seller_orders, batch_size=batch_size)
+
+    order_items = [
+        OrderItem(order_id=seller_order.order_id, seller_order=seller_order, product=product,
+                  seller_id=seller_order.seller_id, product_name=product.name,
+                  product_price=product.get_precio_oferta(), quantity=qty,
+                  subtotal=product.get_precio_oferta() * qty)
+        for seller_order, items in zip(seller_orders, grouped)
+        for product, qty in items
+    ]
+    OrderItem.objects.bulk_create(order_items, batch_size=batch_size)
+
+    pairs = {(so.order.user_id, so.seller_id) for so in seller_orders if so.status == 'delivered'}
+    TradingPartner.registrar(sorted(pairs))
+
+    # Una review de cada lado para la mitad de las compras entregadas
+    reviews, seen = [], set()
+    for buyer_id, seller_id in sorted(pairs):
+        if rng.random() < 0.5:
+            for autor, receptor in ((buyer_id, seller_id), (seller_id, buyer_id)):
+                if (autor, receptor) not in seen:
+                    seen.add((autor, receptor))
+                    reviews.append(Review(autor_id=autor, receptor_id=receptor, calificacion=rng.randint(1, 5),
+                                          comentario=' '.join(rng.choices(WORDS, k=12))))
+    Review.objects.bulk_create(reviews, batch_size=batch_size)
+
+    return {'orders': len(orders), 'order_items': len(order_items), 'reviews': len(reviews)}
+
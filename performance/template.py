@@ -0,0 +1,29 @@
+import time
+
+from django.template.backends.django import DjangoTemplates as BaseDjangoTemplates, Template
+
+from .stats import current_stats
+
+
+class TimedTemplate(Template):
+    """Suma el tiempo de render al request actual (solo plantillas de primer nivel)"""
+
+    def render(self, context=None, request=None):
+        stats = current_stats.get()
+        if stats is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.render_time += time.perf_counter() - start
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """Backend de Django con medición de render para performance.middleware"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,195 @@
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Profile
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from wishlist.models import Favorito
+from . import replicas, synthetic
+from .middleware import QueryBudgetExceeded, _setup_request_log, request_log
+from .stats import fingerprint
+
+
+@override_settings(PERF_INSTRUMENTATION=True, PERF_BUDGET_MODE='fail', PERF_LOG_FILE=None)
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('vendedor', password='clave-de-prueba')
+        category = Category.objects.create(name='Libros')
+        for i in range(12):
+            Product.objects.create(name=f'Libro {i}', category=category, price=10, owner=self.user.profile)
+        self.client.force_login(self.user)
+
+    def test_vistas_principales_dentro_del_presupuesto(self):
+        for name, args in [
+            ('home', []),
+            ('product_list', []),
+            ('seller_storefront', ['vendedor']),
+            ('cart_view', []),
+            ('seller_orders', []),
+            ('reviews', []),
+        ]:
+            with self.subTest(view=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(PERF_BUDGETS={'product_list': {'queries': 1}})
+    def test_falla_si_se_excede(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('product_list'))
+
+    def test_log_con_nombre_de_archivo_suelto(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                with override_settings(PERF_LOG_FILE='requests.log'):
+                    _setup_request_log()
+                handler = request_log.handlers[0]
+                request_log.removeHandler(handler)
+                handler.close()
+                self.assertTrue(os.path.exists(os.path.join(directory, 'requests.log')))
+            finally:
+                os.chdir(cwd)
+
+    def test_huella_agrupa_listas_in(self):
+        a = fingerprint('SELECT * FROM t WHERE id IN (%s, %s)')
+        b = fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)')
+        self.assertEqual(a, b)
+
+
+class SyntheticDataTests(TestCase):
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('id').values_list('name', 'price', 'stock', 'favorites_count')),
+            list(Order.objects.order_by('id').values_list('order_number', 'status', 'total')),
+        )
+
+    def test_misma_semilla_mismos_datos(self):
+        counts = synthetic.generate(users=12, products_per_seller=3, orders_per_buyer=2, categories=2, seed=7)
+        first = self.snapshot()
+        synthetic.reset()
+        synthetic.generate(users=12, products_per_seller=3, orders_per_buyer=2, categories=2, seed=7)
+
+        self.assertEqual(first, self.snapshot())
+        self.assertEqual(counts['products'], 12)
+
+    def test_completa_lo_que_hacen_las_senales(self):
+        synthetic.generate(users=12, products_per_seller=3, orders_per_buyer=2, categories=2)
+
+        self.assertEqual(Profile.objects.count(), User.objects.count())
+        self.assertFalse(OrderItem.objects.filter(seller_order__isnull=True).exists())
+        product = Product.objects.order_by('-favorites_count').first()
+        self.assertEqual(product.favorites_count, Favorito.objects.filter(producto=product).count())
+
+
+class DatabaseProfileTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_perfil_por_defecto_sin_wal(self):
+        # WAL queda grabado en el archivo: solo se activa a pedido (sqlite-tuned)
+        self.assertEqual(settings.DATABASE_PROFILES['sqlite']['OPTIONS']['init_command'], '')
+        self.assertIn('PRAGMA journal_mode=WAL', settings.DATABASE_PROFILES['sqlite-tuned']['OPTIONS']['init_command'])
+
+    def test_pragmas_del_perfil_sqlite_tuned(self):
+        if connection.vendor != 'sqlite' or 'journal_mode' not in connection.settings_dict['OPTIONS']['init_command']:
+            self.skipTest('Solo con DB_PROFILE=sqlite-tuned')
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.PrimaryReplicaRouter()
+
+    def run_request(self, method, cookies=None):
+        """Corre el middleware con una vista que lee, escribe y vuelve a leer"""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            seen.append(self.router.db_for_write(Product))
+            seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        response = replicas.ReplicaStickinessMiddleware(view)(request)
+        return seen, response
+
+    def test_lecturas_repartidas_y_escrituras_a_la_primaria(self):
+        reads = {self.router.db_for_read(Product) for _ in range(50)}
+        self.assertEqual(reads, {'replica1', 'replica2'})
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+
+    def test_lee_de_la_primaria_despues_de_escribir(self):
+        seen, response = self.run_request('get')
+        self.assertIn(seen[0], ['replica1', 'replica2'])
+        self.assertEqual(seen[1:], ['default', 'default'])
+        self.assertIn(replicas.STICKY_COOKIE, response.cookies)
+
+        # El request siguiente (el redirect) trae la cookie
+        seen, _ = self.run_request('get', {replicas.STICKY_COOKIE: '1'})
+        self.assertEqual(seen[0], 'default')
+
+    def test_post_lee_de_la_primaria(self):
+        seen, _ = self.run_request('post')
+        self.assertEqual(seen, ['default'] * 3)
+
+    def test_use_primary(self):
+        with replicas.use_primary():
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+
+@unittest.skipUnless(settings.DATABASE_REPLICAS, 'Sin réplicas (usar --settings=marketplace.settings_replicas)')
+class ReplicaIntegrationTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user('comprador', password='clave-de-prueba')
+        category = Category.objects.create(name='Libros')
+        self.product = Product.objects.create(name='Libro', category=category, price=10, stock=5,
+                                              owner=self.user.profile)
+
+    def queries(self, call):
+        """Ejecuta call() y devuelve [(alias, sql)] de todas las conexiones"""
+        executed = []
+
+        def recorder(alias):
+            def wrapper(execute, sql, params, many, context):
+                executed.append((alias, sql))
+                return execute(sql, params, many, context)
+            return wrapper
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder(alias)))
+            call()
+        return executed
+
+    def test_lecturas_en_replicas(self):
+        executed = self.queries(lambda: [self.client.get(reverse('product_list')) for _ in range(10)])
+        aliases = {alias for alias, _ in executed}
+        self.assertEqual(aliases, set(settings.DATABASE_REPLICAS))
+
+    def test_escrituras_en_la_primaria_y_redirect_pegado(self):
+        self.client.force_login(self.user)
+        executed = self.queries(lambda: self.client.post(reverse('cart_add', args=[self.product.id]), follow=True))
+        writes = [alias for alias, sql in executed if not sql.lstrip().upper().startswith('SELECT')]
+        self.assertTrue(writes)
+        self.assertEqual(set(writes), {'default'})
+        # El GET del redirect también leyó de la primaria
+        self.assertEqual({alias for alias, _ in executed}, {'default'})
@@ -1,7 +1,15 @@
+from django.conf import settings
+
+from marketplace.tagcache import tag_versions
+from products.invalidation import CATALOG_TAG
 from products.models import Category
 
 def categories_processor(request):
     """Hace que las categorías estén disponibles en todos los templates"""
     return {
-        'categories': Category.objects.all()
-    }
\ No newline at end of file
+        'categories': Category.objects.all(),
+        # Clave de los fragmentos del menú y de las tarjetas (nombres de categorías):
+        # cambia al modificarse el catálogo
+        'catalog_version': tag_versions([CATALOG_TAG])[CATALOG_TAG],
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
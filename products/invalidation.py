@@ -0,0 +1,63 @@
+"""
+Etiquetas de cache del catálogo y las señales que las invalidan.
+
+- category:<id>: una categoría con sus subcategorías y productos
+- seller:<profile_id>: productos y reputación de un vendedor (tienda)
+- catalogo: listados y menú de categorías
+
+Las escrituras con update() no disparan señales; el stock invalida la tienda
+explícitamente. Las tarjetas de productos no usan etiquetas: su clave lleva
+update_time, stock y favorites_count.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from marketplace.tagcache import invalidate
+from orders.models import Review
+from .models import Category, Product, SubCategory
+
+CATALOG_TAG = 'catalogo'
+
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+
+def seller_tag(profile_id):
+    return f'seller:{profile_id}'
+
+
+def invalidate_sellers(owner_ids):
+    """Para cambios hechos con update() (stock): las tiendas de los vendedores"""
+    invalidate(*(seller_tag(owner_id) for owner_id in set(owner_ids) if owner_id))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def producto_modificado(sender, instance, **kwargs):
+    tags = [category_tag(instance.category_id), CATALOG_TAG]
+    if instance.owner_id:
+        tags.append(seller_tag(instance.owner_id))
+    invalidate(*tags)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def categoria_modificada(sender, instance, **kwargs):
+    invalidate(category_tag(instance.id), CATALOG_TAG)
+
+
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def subcategoria_modificada(sender, instance, **kwargs):
+    invalidate(category_tag(instance.category_id), CATALOG_TAG)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_modificada(sender, instance, **kwargs):
+    profile_id = Profile.objects.filter(user_id=instance.receptor_id).values_list('id', flat=True).first()
+    if profile_id:
+        invalidate(seller_tag(profile_id))
+
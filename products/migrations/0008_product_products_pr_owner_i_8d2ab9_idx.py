@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_rating_1_profile_rating_2_profile_rating_3_and_more'),
+        ('products', '0007_alter_product_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'creation_time'], name='products_pr_owner_i_8d2ab9_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_favoritos(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Favorito = apps.get_model('wishlist', 'Favorito')
+
+    cantidad = (
+        Favorito.objects.filter(producto=OuterRef('pk'))
+        .order_by().values('producto').annotate(total=Count('id')).values('total')
+    )
+    Product.objects.update(favorites_count=Coalesce(Subquery(cantidad), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_products_pr_owner_i_8d2ab9_idx'),
+        ('wishlist', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='favorites_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(contar_favoritos, migrations.RunPython.noop),
+    ]
@@ -29,9 +29,17 @@ class Product(models.Model):
     porcentaje_descuento = models.PositiveIntegerField(default=0, verbose_name="% de descuento", 
                                                         help_text="Descuento del 0 al 100%")
     
+    # Cantidad de usuarios que lo tienen en favoritos, mantenida con F() en las vistas de wishlist
+    favorites_count = models.PositiveIntegerField(default=0, db_index=True)
+    
     creation_time = models.DateTimeField(auto_now_add=True)
     update_time = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'creation_time']),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -0,0 +1,53 @@
+"""
+Tienda pública de cada vendedor.
+
+Las páginas se recorren con cursor sobre el índice (owner, creation_time) y
+el HTML de cada página se guarda con {% cache %}. La clave del fragmento
+incluye la versión de la etiqueta seller:<id> (products.invalidation), que
+cambia cada vez que se guarda o borra uno de sus productos, así las páginas
+viejas dejan de usarse.
+"""
+from django.utils.functional import cached_property
+
+from marketplace.pagination import encode_cursor, keyset_page, parse_cursor
+from .models import Product
+
+STOREFRONT_PAGE_SIZE = 12
+STOREFRONT_ORDERING = ('-creation_time', '-id')
+# El stock se descuenta con UPDATE (sin señales): una página cacheada puede
+# mostrar stock viejo como mucho este tiempo
+STOREFRONT_CACHE_TIMEOUT = 5 * 60
+
+
+class ProductPage:
+    """Página de productos de un vendedor. La consulta corre recién al usarla"""
+
+    def __init__(self, queryset, cursor=None, size=STOREFRONT_PAGE_SIZE):
+        self.queryset = queryset
+        self.cursor = cursor
+        self.size = size
+
+    @cached_property
+    def _page(self):
+        return keyset_page(self.queryset, STOREFRONT_ORDERING, self.cursor, self.size)
+
+    @property
+    def products(self):
+        return self._page[0]
+
+    @property
+    def next_cursor(self):
+        return self._page[1]
+
+
+def clean_cursor(cursor):
+    """
+    Cursor normalizado, o '' si es inválido. Solo un cursor válido puede
+    formar parte de la clave del fragmento.
+    """
+    values = parse_cursor(Product, STOREFRONT_ORDERING, cursor)
+    return encode_cursor(values) if values else ''
+
+
+def seller_products(owner):
+    return Product.objects.filter(owner=owner).select_related('category')
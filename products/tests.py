@@ -1,3 +1,181 @@
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from marketplace import tagcache
+from marketplace.pagination import encode_cursor
+from orders.models import Review, TradingPartner
+from orders.stock import reserve_stock
+from wishlist.models import Favorito
+from .invalidation import CATALOG_TAG, category_tag, seller_tag
+from .models import Category, Product, SubCategory
+
+
+class TagCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('vendedor', password='clave-de-prueba')
+        self.category = Category.objects.create(name='Libros')
+        self.product = Product.objects.create(name='Libro', category=self.category, price=10,
+                                              owner=self.seller.profile)
+
+    def cached(self, key, tags):
+        compute = mock.Mock(return_value='valor')
+        tagcache.get_or_set(key, compute, tags)
+        return compute.call_count
+
+    def assertInvalidates(self, tag, change):
+        cache.clear()
+        self.assertEqual(self.cached('clave', [tag]), 1)
+        self.assertEqual(self.cached('clave', [tag]), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(self.cached('clave', [tag]), 1)
+
+    def test_invalidar_una_etiqueta_no_afecta_a_otras(self):
+        self.cached('a', ['product:1'])
+        self.cached('b', ['product:2'])
+        with self.captureOnCommitCallbacks(execute=True):
+            tagcache.invalidate('product:1')
+        self.assertEqual(self.cached('a', ['product:1']), 1)
+        self.assertEqual(self.cached('b', ['product:2']), 0)
+
+    def test_senales_del_catalogo(self):
+        self.assertInvalidates(seller_tag(self.seller.profile.id), lambda: self.product.save())
+        self.assertInvalidates(category_tag(self.category.id),
+                               lambda: SubCategory.objects.create(category=self.category, name='Novelas'))
+        self.assertInvalidates(CATALOG_TAG, lambda: Category.objects.create(name='Hogar'))
+
+    def test_reviews_y_stock(self):
+        buyer = User.objects.create_user('comprador', password='clave-de-prueba')
+        TradingPartner.registrar([(buyer.id, self.seller.id)])
+        self.assertInvalidates(seller_tag(self.seller.profile.id), lambda: reserve_stock(self.product, 1))
+        self.assertInvalidates(seller_tag(self.seller.profile.id),
+                               lambda: Review.objects.create(autor=buyer, receptor=self.seller,
+                                                             calificacion=5, comentario='Bien'))
+
+    def test_con_el_lock_tomado_devuelve_el_valor_viejo(self):
+        tagcache.get_or_set('clave', lambda: 'viejo', ['product:1'])
+        with self.captureOnCommitCallbacks(execute=True):
+            tagcache.invalidate('product:1')
+        cache.add('tc-lock:clave', 1)  # Otro worker está recalculando
+
+        compute = mock.Mock(return_value='nuevo')
+        self.assertEqual(tagcache.get_or_set('clave', compute, ['product:1']), 'viejo')
+        compute.assert_not_called()
+
+        cache.delete('tc-lock:clave')
+        self.assertEqual(tagcache.get_or_set('clave', compute, ['product:1']), 'nuevo')
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user('vendedor', password='clave-de-prueba')
+        self.product = Product.objects.create(name='Libro', category=Category.objects.create(name='Libros'),
+                                              price=10, stock=5, owner=seller.profile)
+        self.fan = User.objects.create_user('fan', password='clave-de-prueba')
+        Favorito.objects.create(usuario=self.fan, producto=self.product)
+
+    def get_list(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse('product_list')).content.decode()
+
+    def heart(self, html):
+        return re.search(rf'data-producto-id="{self.product.id}">\s*<i class="(\w+) fa-heart"', html).group(1)
+
+    def test_favorito_fuera_del_fragmento(self):
+        self.assertEqual(self.heart(self.get_list(self.fan)), 'fas')
+        other = User.objects.create_user('otro', password='clave-de-prueba')
+        self.assertEqual(self.heart(self.get_list(other)), 'far')
+
+    def test_la_tarjeta_cambia_con_el_producto(self):
+        self.get_list(self.fan)
+        self.product.name = 'Libro usado'
+        self.product.save()
+        self.assertIn('Libro usado', self.get_list(self.fan))
+
+        # El stock se descuenta con UPDATE, sin tocar update_time
+        Product.objects.filter(id=self.product.id).update(stock=2)
+        self.assertIn('Stock: 2', self.get_list(self.fan))
+
+    def test_renombrar_la_categoria_cambia_las_tarjetas(self):
+        self.get_list(self.fan)
+        category = self.product.category
+        category.name = 'Libros usados'
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        self.assertRegex(self.get_list(self.fan), r'fa-tag"></i> Libros usados')
+
+
+class StorefrontTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('vendedor', password='clave-de-prueba')
+        category = Category.objects.create(name='Libros')
+        self.products = [
+            Product.objects.create(name=f'Libro {i}', category=category, price=10, stock=5,
+                                   owner=self.seller.profile)
+            for i in range(13)
+        ]
+        self.url = reverse('seller_storefront', args=[self.seller.username])
+
+    def product_queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, [q for q in ctx.captured_queries if 'products_product' in q['sql']]
+
+    def test_paginas(self):
+        first, _ = self.product_queries()
+        cursor = first.context['page'].next_cursor
+        self.assertEqual(len(first.context['page'].products), 12)
+        second, _ = self.product_queries({'cursor': cursor})
+        self.assertEqual([p.name for p in second.context['page'].products], ['Libro 0'])
+        self.assertIsNone(second.context['page'].next_cursor)
+
+    def test_cursor_invalido_usa_el_fragmento_de_la_primera_pagina(self):
+        first, queries = self.product_queries()
+        self.assertTrue(queries)
+        for cursor in [encode_cursor(['zzz', 'y']), 'basura']:
+            response, queries = self.product_queries({'cursor': cursor})
+            self.assertEqual(response.context['cursor'], '')
+            self.assertEqual(queries, [])  # Mismo fragmento: la consulta no corre
+            self.assertEqual(response.content, first.content)
+
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse('my_products'), {'cursor': encode_cursor(['zzz', 'y'])})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_first_page'])
+
+    def test_guardar_un_producto_invalida_la_tienda(self):
+        self.product_queries()
+        product = self.products[-1]
+        product.name = 'Libro usado'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        response, queries = self.product_queries()
+        self.assertTrue(queries)
+        self.assertContains(response, 'Libro usado')
+
+    def test_vender_stock_invalida_la_tienda(self):
+        response, _ = self.product_queries()
+        self.assertNotContains(response, 'Sin stock')
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock(self.products[-1], 5)
+        response, queries = self.product_queries()
+        self.assertTrue(queries)
+        self.assertContains(response, 'Sin stock')
 
-# Create your tests here.
+    def test_la_clave_usa_la_etiqueta_del_vendedor(self):
+        self.product_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            tagcache.invalidate(seller_tag(self.seller.profile.id))
+        _, queries = self.product_queries()
+        self.assertTrue(queries)
@@ -2,12 +2,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
 from .models import Product, Category, SubCategory
+from .invalidation import seller_tag
+from .storefront import STOREFRONT_CACHE_TIMEOUT, ProductPage, clean_cursor, seller_products
+from marketplace.tagcache import tag_versions
+from accounts.models import Profile
 from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.contrib import messages
 
 def product_list(request):
-    products = Product.objects.all().order_by('-creation_time')
+    products = Product.objects.select_related('category', 'owner').order_by('-creation_time')
     categories = Category.objects.all()
     subcategories = []
 
@@ -20,6 +24,7 @@ def product_list(request):
     tipo_venta = request.GET.get('tipo_venta', '')
     solo_ofertas = request.GET.get('solo_ofertas', '')
     show_unavailable = request.GET.get('mostrar_agotados', 'false')
+    orden = request.GET.get('orden', '')
 
     if search_query:
         products = products.filter(name__icontains=search_query)
@@ -56,6 +61,9 @@ def product_list(request):
     if show_unavailable != 'true':
         products = products.filter(stock__gt=0)
 
+    if orden == 'favoritos':
+        products = products.order_by('-favorites_count', '-creation_time')
+
     paginator = Paginator(products, 9) #Cantidad de productos por página
     page_number = request.GET.get('page')
     products = paginator.get_page(page_number)
@@ -73,6 +81,7 @@ def product_list(request):
         'tipo_venta': tipo_venta,
         'solo_ofertas': solo_ofertas,
         'mostrar_agotados': show_unavailable,
+        'orden': orden,
     }
 
     return render(request, 'products/product_list.html', context)
@@ -229,13 +238,32 @@ def product_detail(request, product_id):
 @login_required
 def my_products(request):
     """Listar mis productos"""
-    products = Product.objects.filter(owner=request.user.profile).order_by('-creation_time')
+    cursor = clean_cursor(request.GET.get('cursor'))
+    page = ProductPage(seller_products(request.user.profile), cursor)
     
     context = {
-        'products': products
+        'products': page.products,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not cursor,
     }
     return render(request, 'products/my_products.html', context)
 
+def seller_storefront(request, username):
+    """Tienda pública de un vendedor"""
+    seller = get_object_or_404(Profile.objects.select_related('user'), user__username=username)
+    cursor = clean_cursor(request.GET.get('cursor'))
+    tag = seller_tag(seller.id)
+    
+    context = {
+        'seller': seller,
+        # La consulta de productos solo corre si el fragmento no está en cache
+        'page': ProductPage(seller_products(seller), cursor),
+        'cursor': cursor,
+        'version': tag_versions([tag])[tag],
+        'cache_timeout': STOREFRONT_CACHE_TIMEOUT,
+    }
+    return render(request, 'products/storefront.html', context)
+
 def category_add(request):
     if not request.user.is_staff:
         messages.error(request, 'No tienes permiso para agregar categorías')
@@ -1,9 +1,16 @@
 from django.contrib import admin
-from .models import Favorito
+from .models import AvisoPrecio, Favorito
 
 @admin.register(Favorito)
 class FavoritoAdmin(admin.ModelAdmin):
     list_display = ('usuario', 'producto', 'fecha_agregado')
     list_filter = ('fecha_agregado',)
     search_fields = ('usuario__username', 'producto__nombre')
-    date_hierarchy = 'fecha_agregado'
\ No newline at end of file
+    date_hierarchy = 'fecha_agregado'
+
+
+@admin.register(AvisoPrecio)
+class AvisoPrecioAdmin(admin.ModelAdmin):
+    list_display = ('usuario', 'producto', 'precio_anterior', 'precio_nuevo', 'leido', 'creado')
+    list_filter = ('leido', 'creado')
+    search_fields = ('usuario__username', 'producto__name')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from wishlist.precios import detectar_bajas
+
+
+class Command(BaseCommand):
+    help = 'Avisa a los usuarios cuando baja el precio de un producto que tienen en favoritos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        revisados, avisos = detectar_bajas(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{revisados} producto(s) revisados, {avisos} aviso(s) creados'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from wishlist.models import Favorito
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Product.favorites_count a partir de la tabla de favoritos'
+
+    def handle(self, *args, **options):
+        fixed = Favorito.recontar()
+        self.stdout.write(self.style.SUCCESS(f'{fixed} producto(s) corregidos'))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_products_pr_owner_i_8d2ab9_idx'),
+        ('wishlist', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSnapshot',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='products.product')),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('tomado_en', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PriceWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('procesado_hasta', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AvisoPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precio_anterior', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('precio_nuevo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('leido', models.BooleanField(default=False)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avisos_precio', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Aviso de precio',
+                'verbose_name_plural': 'Avisos de precio',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['usuario', 'leido'], name='wishlist_av_usuario_f4c5b5_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from products.models import Product
 
@@ -14,4 +16,55 @@ class Favorito(models.Model):
         verbose_name_plural = 'Favoritos'
     
     def __str__(self):
-        return f"{self.usuario.username} - {self.producto.name}"
\ No newline at end of file
+        return f"{self.usuario.username} - {self.producto.name}"
+
+    @classmethod
+    def recontar(cls, producto_ids=None):
+        """Corrige Product.favorites_count donde no coincide. Devuelve cuántos productos cambió"""
+        cantidad = Coalesce(Subquery(
+            cls.objects.filter(producto=OuterRef('pk'))
+            .order_by().values('producto').annotate(total=Count('id')).values('total')
+        ), 0)
+        productos = Product.objects.annotate(real=cantidad).exclude(favorites_count=F('real'))
+        if producto_ids is not None:
+            productos = productos.filter(id__in=producto_ids)
+        return productos.update(favorites_count=cantidad)
+
+class PriceSnapshot(models.Model):
+    """Último precio efectivo visto por el detector de bajas de precio"""
+    producto = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    precio = models.DecimalField(max_digits=12, decimal_places=2)
+    tomado_en = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.producto_id}: ${self.precio}"
+
+
+class PriceWatermark(models.Model):
+    """Hasta qué update_time de Product ya se revisaron precios (una sola fila)"""
+    procesado_hasta = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def actual(cls):
+        return cls.objects.get_or_create(pk=1)[0]
+
+
+class AvisoPrecio(models.Model):
+    """Aviso a un usuario de que bajó el precio de uno de sus favoritos"""
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='avisos_precio')
+    producto = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    precio_anterior = models.DecimalField(max_digits=12, decimal_places=2)
+    precio_nuevo = models.DecimalField(max_digits=12, decimal_places=2)
+    leido = models.BooleanField(default=False)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-creado']
+        indexes = [
+            models.Index(fields=['usuario', 'leido']),
+        ]
+        verbose_name = 'Aviso de precio'
+        verbose_name_plural = 'Avisos de precio'
+
+    def __str__(self):
+        return f"{self.usuario.username} - {self.producto.name}: ${self.precio_anterior} -> ${self.precio_nuevo}"
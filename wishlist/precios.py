@@ -0,0 +1,84 @@
+"""
+Detección de bajas de precio en productos favoritos, en lote.
+
+En vez de revisar en cada guardado, un comando compara el precio efectivo
+(con oferta) de los productos modificados desde la última corrida contra el
+último precio guardado en PriceSnapshot, y crea un AvisoPrecio para cada
+usuario que tiene en favoritos un producto que bajó.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Product
+from .models import AvisoPrecio, Favorito, PriceSnapshot, PriceWatermark
+
+# Una transacción que guardó un producto justo antes de "ahora" puede no haber
+# hecho commit todavía: se deja ese margen para la próxima corrida
+MARGEN_COMMIT = timedelta(seconds=60)
+
+
+def _procesar_lote(productos, ahora):
+    """Compara un lote de productos con sus snapshots. Devuelve cuántos avisos creó"""
+    anteriores = dict(
+        PriceSnapshot.objects.filter(producto_id__in=[p.id for p in productos])
+        .values_list('producto_id', 'precio')
+    )
+
+    snapshots = []
+    bajas = {}
+    for producto in productos:
+        precio = producto.get_precio_oferta()
+        snapshots.append(PriceSnapshot(producto_id=producto.id, precio=precio, tomado_en=ahora))
+        anterior = anteriores.get(producto.id)
+        # Los productos solo de intercambio tienen precio 0: no es una baja
+        if anterior is not None and precio < anterior and producto.acepta_venta():
+            bajas[producto.id] = (anterior, precio)
+
+    with transaction.atomic():
+        avisos = [
+            AvisoPrecio(usuario_id=usuario_id, producto_id=producto_id,
+                        precio_anterior=bajas[producto_id][0], precio_nuevo=bajas[producto_id][1])
+            for usuario_id, producto_id in
+            Favorito.objects.filter(producto_id__in=bajas).values_list('usuario_id', 'producto_id')
+        ] if bajas else []
+        AvisoPrecio.objects.bulk_create(avisos)
+        PriceSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['producto'],
+            update_fields=['precio', 'tomado_en'],
+        )
+    return len(avisos)
+
+
+def detectar_bajas(batch_size=1000):
+    """
+    Revisa los productos con update_time posterior a la marca de agua.
+    Devuelve (productos revisados, avisos creados).
+    """
+    marca = PriceWatermark.actual()
+    ahora = timezone.now()
+    hasta = ahora - MARGEN_COMMIT
+
+    productos = Product.objects.filter(update_time__lte=hasta, price__isnull=False)
+    if marca.procesado_hasta:
+        productos = productos.filter(update_time__gt=marca.procesado_hasta)
+    productos = productos.only('id', 'price', 'en_oferta', 'porcentaje_descuento', 'tipo_venta').order_by('id')
+
+    revisados = avisos = 0
+    ultimo_id = 0
+    while True:
+        lote = list(productos.filter(id__gt=ultimo_id)[:batch_size])
+        if not lote:
+            break
+        avisos += _procesar_lote(lote, ahora)
+        revisados += len(lote)
+        ultimo_id = lote[-1].id
+
+    # Si la corrida se corta a mitad, la próxima revisa otra vez el rango:
+    # los lotes ya procesados tienen el snapshot al día y no repiten avisos
+    marca.procesado_hasta = hasta
+    marca.save(update_fields=['procesado_hasta'])
+    return revisados, avisos
@@ -1,3 +1,114 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from products.models import Category, Product
+from .models import AvisoPrecio, Favorito
+from .precios import detectar_bajas
+
+
+class FavoritosTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('comprador', password='clave-de-prueba')
+        category = Category.objects.create(name='Libros')
+        self.productos = [
+            Product.objects.create(name=f'Libro {i}', category=category, price=10) for i in range(3)
+        ]
+        self.client.force_login(self.user)
+
+    def _favoritos(self):
+        return set(Favorito.objects.filter(usuario=self.user).values_list('producto_id', flat=True))
+
+    def test_toggle_agrega_y_quita(self):
+        url = reverse('toggle_favorito', args=[self.productos[0].id])
+        headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+        self.assertTrue(self.client.post(url, **headers).json()['es_favorito'])
+        self.assertEqual(self._favoritos(), {self.productos[0].id})
+        self.assertFalse(self.client.post(url, **headers).json()['es_favorito'])
+        self.assertEqual(self._favoritos(), set())
+
+    def test_contador_de_favoritos(self):
+        producto = self.productos[0]
+        self.client.post(reverse('agregar_favorito', args=[producto.id]))
+        self.client.post(reverse('agregar_favorito', args=[producto.id]))
+        producto.refresh_from_db()
+        self.assertEqual(producto.favorites_count, 1)
+
+        self.client.post(reverse('toggle_favorito', args=[producto.id]))
+        self.client.post(reverse('quitar_favorito', args=[producto.id]))
+        producto.refresh_from_db()
+        self.assertEqual(producto.favorites_count, 0)
+
+    def test_el_favorito_se_revierte_si_falla_el_contador(self):
+        producto = self.productos[0]
+        Favorito.objects.create(usuario=self.user, producto=self.productos[1])
+        with mock.patch('wishlist.views._ajustar_contador', side_effect=RuntimeError):
+            for nombre, producto_id in [('agregar_favorito', producto.id), ('toggle_favorito', producto.id),
+                                        ('quitar_favorito', self.productos[1].id),
+                                        ('toggle_favorito', self.productos[1].id)]:
+                with self.assertRaises(RuntimeError):
+                    self.client.post(reverse(nombre, args=[producto_id]))
+                self.assertEqual(self._favoritos(), {self.productos[1].id})
+
+    def test_toggle_producto_inexistente(self):
+        response = self.client.post(reverse('toggle_favorito', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self._favoritos(), set())
+
+    def test_sincronizar_aplica_la_ultima_operacion(self):
+        a, b, c = self.productos
+        Favorito.objects.create(usuario=self.user, producto=b)
+        operaciones = [
+            {'op': 'agregar', 'producto': a.id},
+            {'op': 'quitar', 'producto': b.id},
+            {'op': 'agregar', 'producto': c.id},
+            {'op': 'quitar', 'producto': c.id},
+            {'op': 'agregar', 'producto': 9999},
+        ]
+        response = self.client.post(
+            reverse('sincronizar_favoritos'),
+            json.dumps({'operaciones': operaciones}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['favoritos']), {a.id})
+        self.assertEqual(self._favoritos(), {a.id})
+        self.assertEqual(
+            dict(Product.objects.filter(id__in=[a.id, b.id, c.id]).values_list('id', 'favorites_count')),
+            {a.id: 1, b.id: 0, c.id: 0},
+        )
+
+    def test_sincronizar_rechaza_operaciones_invalidas(self):
+        response = self.client.post(
+            reverse('sincronizar_favoritos'),
+            json.dumps({'operaciones': [{'op': 'borrar_todo', 'producto': 1}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@mock.patch('wishlist.precios.MARGEN_COMMIT', timedelta(0))
+class BajasDePrecioTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('comprador', password='clave-de-prueba')
+        category = Category.objects.create(name='Libros')
+        self.producto = Product.objects.create(name='Libro', category=category, price=100)
+        Favorito.objects.create(usuario=self.user, producto=self.producto)
+
+    def test_avisa_solo_cuando_baja_el_precio(self):
+        self.assertEqual(detectar_bajas(), (1, 0))
+
+        self.producto.en_oferta = True
+        self.producto.porcentaje_descuento = 25
+        self.producto.save()
+        self.assertEqual(detectar_bajas(), (1, 1))
 
-# Create your tests here.
+        aviso = AvisoPrecio.objects.get()
+        self.assertEqual((aviso.usuario, aviso.precio_anterior, aviso.precio_nuevo), (self.user, 100, 75))
+        # Sin cambios desde la última corrida no se revisa nada
+        self.assertEqual(detectar_bajas(), (0, 0))
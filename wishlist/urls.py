@@ -6,4 +6,5 @@ urlpatterns = [
     path('agregar/<int:producto_id>/', views.agregar_favorito, name='agregar_favorito'),
     path('quitar/<int:producto_id>/', views.quitar_favorito, name='quitar_favorito'),
     path('toggle/<int:producto_id>/', views.toggle_favorito, name='toggle_favorito'),
+    path('sincronizar/', views.sincronizar_favoritos, name='sincronizar_favoritos'),
 ]
\ No newline at end of file
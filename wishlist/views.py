@@ -1,18 +1,44 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import json
+
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
-from .models import Favorito
+from .models import AvisoPrecio, Favorito
 from products.models import Product
 
+# Máximo de operaciones aceptadas en una sincronización
+MAX_OPERACIONES_SYNC = 500
+
+
+def _verificar_producto(producto_id):
+    """404 si el producto no existe, sin cargarlo (solo consulta el índice de la PK)"""
+    if not Product.objects.filter(id=producto_id).exists():
+        raise Http404('Producto no encontrado')
+
+
+def _ajustar_contador(producto_id, delta):
+    """Suma o resta en Product.favorites_count con un UPDATE atómico"""
+    productos = Product.objects.filter(id=producto_id)
+    if delta < 0:
+        productos = productos.filter(favorites_count__gte=-delta)
+    productos.update(favorites_count=F('favorites_count') + delta)
+
+
 @login_required
 @require_POST
 def agregar_favorito(request, producto_id):
-    producto = get_object_or_404(Product, id=producto_id)
-    favorito, created = Favorito.objects.get_or_create(
-        usuario=request.user,
-        producto=producto
-    )
+    _verificar_producto(producto_id)
+    # El favorito y su contador se confirman juntos o no se confirma ninguno
+    with transaction.atomic():
+        favorito, created = Favorito.objects.get_or_create(
+            usuario=request.user,
+            producto_id=producto_id
+        )
+        if created:
+            _ajustar_contador(producto_id, 1)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -21,17 +47,19 @@ def agregar_favorito(request, producto_id):
             'message': 'Agregado a favoritos' if created else 'Ya estaba en favoritos'
         })
     
-    return redirect('detalle_producto', producto_id=producto_id)
+    return redirect('product_detail', product_id=producto_id)
 
 
 @login_required
 @require_POST
 def quitar_favorito(request, producto_id):
-    producto = get_object_or_404(Product, id=producto_id)
-    deleted = Favorito.objects.filter(
-        usuario=request.user,
-        producto=producto
-    ).delete()
+    with transaction.atomic():
+        deleted = Favorito.objects.filter(
+            usuario=request.user,
+            producto_id=producto_id
+        ).delete()
+        if deleted[0]:
+            _ajustar_contador(producto_id, -1)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -47,17 +75,23 @@ def quitar_favorito(request, producto_id):
 @require_POST
 def toggle_favorito(request, producto_id):
     """Vista para agregar o quitar con un solo botón"""
-    producto = get_object_or_404(Product, id=producto_id)
-    favorito = Favorito.objects.filter(usuario=request.user, producto=producto)
-    
-    if favorito.exists():
-        favorito.delete()
-        es_favorito = False
-        mensaje = 'Eliminado de favoritos'
-    else:
-        Favorito.objects.create(usuario=request.user, producto=producto)
-        es_favorito = True
-        mensaje = 'Agregado a favoritos'
+    # Primero se intenta borrar; si no había nada, se inserta. get_or_create
+    # resuelve el doble click concurrente (sin IntegrityError) y además dice si
+    # insertó, que hace falta para no contar dos veces en favorites_count
+    with transaction.atomic():
+        deleted, _ = Favorito.objects.filter(usuario=request.user, producto_id=producto_id).delete()
+        
+        if deleted:
+            _ajustar_contador(producto_id, -1)
+            es_favorito = False
+            mensaje = 'Eliminado de favoritos'
+        else:
+            _verificar_producto(producto_id)
+            favorito, created = Favorito.objects.get_or_create(usuario=request.user, producto_id=producto_id)
+            if created:
+                _ajustar_contador(producto_id, 1)
+            es_favorito = True
+            mensaje = 'Agregado a favoritos'
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -69,12 +103,65 @@ def toggle_favorito(request, producto_id):
     return redirect(request.META.get('HTTP_REFERER', 'home'))
 
 
+@login_required
+@require_POST
+def sincronizar_favoritos(request):
+    """
+    Aplica en un solo request una lista de operaciones hechas sin conexión:
+    {"operaciones": [{"op": "agregar" | "quitar", "producto": id}, ...]}
+    Si un producto aparece varias veces, vale la última operación.
+    """
+    try:
+        operaciones = json.loads(request.body).get('operaciones', [])
+        if len(operaciones) > MAX_OPERACIONES_SYNC:
+            return JsonResponse({
+                'success': False,
+                'message': f'Se aceptan hasta {MAX_OPERACIONES_SYNC} operaciones por request'
+            }, status=400)
+        estado = {}
+        for operacion in operaciones:
+            if operacion['op'] not in ('agregar', 'quitar'):
+                raise ValueError(operacion['op'])
+            estado[int(operacion['producto'])] = operacion['op']
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'success': False, 'message': 'Operaciones inválidas'}, status=400)
+    
+    quitar = [producto_id for producto_id, op in estado.items() if op == 'quitar']
+    agregar = [producto_id for producto_id, op in estado.items() if op == 'agregar']
+    
+    with transaction.atomic():
+        if quitar:
+            Favorito.objects.filter(usuario=request.user, producto_id__in=quitar).delete()
+        if agregar:
+            # Los productos que ya no existen se descartan
+            existentes = Product.objects.filter(id__in=agregar).values_list('id', flat=True)
+            Favorito.objects.bulk_create(
+                [Favorito(usuario=request.user, producto_id=producto_id) for producto_id in existentes],
+                ignore_conflicts=True,
+            )
+        # bulk_create no informa qué filas insertó: se recuentan solo los productos tocados
+        Favorito.recontar(list(estado))
+    
+    return JsonResponse({
+        'success': True,
+        'favoritos': list(Favorito.objects.filter(usuario=request.user).values_list('producto_id', flat=True)),
+    })
+
+
 @login_required
 def lista_favoritos(request):
     favoritos = Favorito.objects.filter(usuario=request.user).select_related('producto')
     
+    # Avisos de bajas de precio sin leer: se muestran una vez
+    avisos = list(
+        AvisoPrecio.objects.filter(usuario=request.user, leido=False).select_related('producto')[:20]
+    )
+    if avisos:
+        AvisoPrecio.objects.filter(id__in=[aviso.id for aviso in avisos]).update(leido=True)
+    
     context = {
         'favoritos': favoritos,
+        'avisos': avisos,
         'total_favoritos': favoritos.count()
     }
     return render(request, 'favoritos/lista_favoritos.html', context)